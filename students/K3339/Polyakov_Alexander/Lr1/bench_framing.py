@@ -0,0 +1,73 @@
+"""Micro-benchmark: bytearray.partition splitting vs framing.LineFramer.
+
+A burst of `--lines` NDJSON lines arrives in `--chunk`-byte reads, the
+way recv() hands it over:
+
+    python bench_framing.py --lines 20000 --chunk 65536
+"""
+import argparse
+import json
+import time
+
+from framing import LineFramer
+
+
+def make_burst(lines: int, size: int) -> bytes:
+    return b"".join(
+        (json.dumps({"name": f"user{i % 100}", "message": "x" * size}) + "\n").encode()
+        for i in range(lines)
+    )
+
+
+def split_partition(chunks: list[bytes]) -> int:
+    # What the chat client and server used to do
+    buf = bytearray()
+    n = 0
+    for chunk in chunks:
+        buf.extend(chunk)
+        while b"\n" in buf:
+            line, _, buf = buf.partition(b"\n")
+            n += 1
+    return n
+
+
+def split_framer(chunks: list[bytes]) -> int:
+    framer = LineFramer(max_frame=64 * 1024)
+    n = 0
+    for chunk in chunks:
+        framer.feed(chunk)
+        for _ in framer:
+            n += 1
+    return n
+
+
+def best_of(fn, chunks: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(chunks)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line framing micro-benchmark")
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--size", type=int, default=40, help="message text length")
+    parser.add_argument("--chunk", type=int, nargs="+", default=[4096, 65536, 1 << 20],
+                        help="bytes per simulated recv()")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    burst = make_burst(args.lines, args.size)
+    print(f"{args.lines} lines, {len(burst)} bytes")
+    print(f"{'chunk':>9} {'partition ms':>13} {'framer ms':>10} {'speedup':>8}")
+    for size in args.chunk:
+        chunks = [burst[i:i + size] for i in range(0, len(burst), size)]
+        assert split_partition(chunks) == split_framer(chunks) == args.lines
+        old = best_of(split_partition, chunks, args.repeat)
+        new = best_of(split_framer, chunks, args.repeat)
+        print(f"{size:>9} {old * 1000:>13.2f} {new * 1000:>10.2f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Helpers shared by the Lr1 benchmarks and servers.
+
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, "server.py", "--port", str(port)])
+    wait_ready(port)
+    ...
+    print(percentile(sorted(latencies), 99))
+
+The scripts import it with their parent directory on sys.path.
+"""
+import socket
+import time
+
+
+def free_port(kind: int = socket.SOCK_STREAM) -> int:
+    """A port on 127.0.0.1 that nothing listens on right now."""
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, deadline: float = 5.0):
+    """Wait until a TCP server accepts connections on `port`."""
+    end = time.monotonic() + deadline
+    while time.monotonic() < end:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))
+    return sorted_values[k]
+
+
+def raise_fd_limit():
+    """Allow as many sockets as the hard limit permits (10k+ connections)."""
+    try:
+        import resource
+    except ImportError:  # not on Unix
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
@@ -0,0 +1,107 @@
+"""Incremental line framing shared by the Lr1 clients and servers.
+
+Splitting a buffer with `bytearray.partition` copies everything after the
+first line, once per line, so a burst of N lines costs O(N^2). LineFramer
+keeps one buffer and an offset cursor instead: every frame is copied out
+once (big ones through a memoryview, so not even a temporary slice is
+made) and consumed bytes are dropped only now and then, in one go.
+
+    framer = LineFramer(max_frame=4096)
+    framer.feed(sock.recv(4096))
+    for line in framer:
+        ...
+
+The scripts import it with their parent directory on sys.path.
+"""
+
+COMPACT_AT = 64 * 1024  # drop consumed bytes once this many have piled up
+# Frames from this size on are copied out through a memoryview; for smaller
+# ones creating the view costs more than the extra copy of a slice
+VIEW_FROM = 16 * 1024
+
+
+class FrameTooLong(ValueError):
+    """A frame grew past max_frame; it is discarded and the framer stays usable."""
+
+
+class LineFramer:
+    def __init__(self, delim: bytes = b"\n", max_frame: int | None = None, keep_delim: bool = False):
+        self.delim = delim
+        self.max_frame = max_frame
+        self.keep_delim = keep_delim
+        self.buf = bytearray()
+        self.pos = 0         # start of the first unconsumed byte
+        self.scan = 0        # where to resume looking for the delimiter
+        self.skipping = False  # inside an over-long frame, dropping up to its end
+
+    def __len__(self) -> int:
+        """Bytes buffered but not yet returned."""
+        return len(self.buf) - self.pos
+
+    def feed(self, data: bytes):
+        if self.pos == len(self.buf):
+            # Everything consumed: restart at the front for free
+            self.buf.clear()
+            self.pos = self.scan = 0
+        elif self.pos >= COMPACT_AT:
+            del self.buf[:self.pos]
+            self.scan -= self.pos
+            self.pos = 0
+        self.buf += data
+
+    def next(self) -> bytes | None:
+        """The next complete frame, or None until more data is fed.
+
+        Raises FrameTooLong once per frame longer than max_frame.
+        """
+        buf, delim = self.buf, self.delim
+        while True:
+            end = buf.find(delim, self.scan)
+            if end == -1:
+                # Don't rescan what we've already looked at (keep a tail for multi-byte delims)
+                self.scan = max(self.pos, len(buf) - len(delim) + 1)
+                if self.max_frame is not None and len(buf) - self.pos > self.max_frame:
+                    # Don't keep buffering a frame we'll refuse anyway
+                    self.pos = self.scan = len(buf)
+                    if not self.skipping:
+                        self.skipping = True
+                        raise FrameTooLong(f"frame longer than {self.max_frame} bytes")
+                return None
+
+            start, stop = self.pos, end + len(delim)
+            self.pos = self.scan = stop
+            if self.skipping:
+                # Tail of an over-long frame that was already reported
+                self.skipping = False
+                continue
+            if self.max_frame is not None and end - start > self.max_frame:
+                raise FrameTooLong(f"frame longer than {self.max_frame} bytes")
+            if not self.keep_delim:
+                stop = end
+            if stop - start < VIEW_FROM:
+                return bytes(buf[start:stop])
+            with memoryview(buf) as mv:
+                return mv[start:stop].tobytes()
+
+    def __iter__(self):
+        while (frame := self.next()) is not None:
+            yield frame
+
+    def take(self, n: int) -> bytes | None:
+        """Exactly n raw bytes off the front, or None if fewer are buffered."""
+        if len(self) < n:
+            return None
+        start = self.pos
+        self.pos += n
+        self.scan = max(self.scan, self.pos)
+        with memoryview(self.buf) as mv:
+            return mv[start:self.pos].tobytes()
+
+    def rest(self) -> bytes:
+        """Whatever is buffered (e.g. an unterminated last line), emptying the framer."""
+        with memoryview(self.buf) as mv:
+            data = mv[self.pos:].tobytes()
+        self.buf.clear()
+        self.pos = self.scan = 0
+        self.skipping = False
+        return data
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+from typing import Callable
+
+from server import HOST, PORT, make_reply
+
+
+class HelloProtocol(asyncio.DatagramProtocol):
+    """Same hello/reply contract as server.py, but driven by an asyncio event loop.
+
+    `reply` maps a request datagram to the answer bytes (or None to stay silent),
+    so the protocol can be reused with different reply logic.
+    """
+
+    def __init__(self, reply: Callable[[bytes], bytes | None] = make_reply):
+        self.reply = reply
+        self.transport = None
+        self.received = 0
+        self.sent = 0
+        self.errors = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        # Hot path: no prints, no awaits
+        self.received += 1
+        answer = self.reply(data)
+        if answer is not None:
+            self.transport.sendto(answer, addr)
+            self.sent += 1
+
+    def error_received(self, exc):
+        self.errors += 1
+
+
+async def start_udp_server(host: str = HOST, port: int = PORT,
+                           reply: Callable[[bytes], bytes | None] = make_reply):
+    """Bind the UDP endpoint on the running loop; returns (transport, protocol)."""
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: HelloProtocol(reply),
+        local_addr=(host, port),
+    )
+
+
+async def serve(host: str, port: int):
+    transport, proto = await start_udp_server(host, port)
+    print(f"asyncio UDP server listens on {host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        transport.close()
+        print(f"Handled {proto.received} datagrams, sent {proto.sent}, errors {proto.errors}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio UDP hello server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nShutting down")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Head-to-head benchmark of the UDP server variants.
+
+Each server is started as a subprocess on its own port and driven by the
+load generator from client.py:
+
+    python bench.py --requests 100000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import free_port, percentile
+
+from client import run_load
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+VARIANTS = {
+    "blocking loop": ["server.py"],
+    "blocking, 1 batched worker": ["server.py", "--workers", "1"],
+    "asyncio protocol": ["async_server.py"],
+}
+
+
+def wait_ready(port: int, deadline: float = 5.0):
+    """Ping until the server answers, so startup time isn't measured."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.settimeout(0.1)
+        end = time.monotonic() + deadline
+        while time.monotonic() < end:
+            s.sendto(b"Hello, server", ("127.0.0.1", port))
+            try:
+                s.recvfrom(1024)
+                return
+            except OSError:
+                pass
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def bench_variant(argv: list[str], requests: int, concurrency: int, endpoints: int, timeout: float):
+    port = free_port(socket.SOCK_DGRAM)
+    proc = subprocess.Popen(
+        [sys.executable, *argv, "--port", str(port)],
+        cwd=HERE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        return asyncio.run(run_load(("127.0.0.1", port), requests, concurrency, endpoints, timeout))
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare UDP server variants")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--endpoints", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'variant':<28} {'replies/s':>10} {'loss %':>7} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8}")
+    for name, argv in VARIANTS.items():
+        stats = bench_variant(argv, args.requests, args.concurrency, args.endpoints, args.timeout)
+        rtts = sorted(stats.rtts)
+        loss = 100 * (stats.sent - len(rtts)) / max(stats.sent, 1)
+        print(f"{name:<28} {len(rtts) / stats.elapsed:>10.0f} {loss:>7.2f} "
+              f"{percentile(rtts, 50) * 1000:>8.3f} {percentile(rtts, 99) * 1000:>8.3f} "
+              f"{percentile(rtts, 99.9) * 1000:>8.3f}")
+
+if __name__ == "__main__":
+    main()
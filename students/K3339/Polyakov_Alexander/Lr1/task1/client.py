@@ -1,15 +1,21 @@
+import argparse
+import asyncio
+import os
 import socket
 import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import percentile
 
 SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 8080
 BUF_SIZE = 1024
 TIMEOUT_SEC = 3
+# Load mode
+RCVBUF_BYTES = 4 * 1024 * 1024  # thousands of replies in flight need a bigger socket buffer
 
-def main():
-    # Define server
-    server = (SERVER_HOST, SERVER_PORT)
-
+def main_once(server):
     # Create socker
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
         sock.settimeout(TIMEOUT_SEC)
@@ -21,5 +27,157 @@ def main():
         data, server_address = sock.recvfrom(BUF_SIZE)
         print(f"Response from {server_address}: {data.decode('utf-8')}")
 
+
+class LoadProtocol(asyncio.DatagramProtocol):
+    """Keeps `inflight` requests outstanding and matches replies by their "#<seq>" suffix."""
+
+    def __init__(self, stats: "LoadStats", inflight: int, timeout: float):
+        self.stats = stats
+        self.inflight = inflight
+        self.timeout = timeout
+        self.pending: dict[int, float] = {}  # seq -> send time, in send order
+        self.transport = None
+        self.done = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_BYTES)
+        except OSError:
+            pass
+        for _ in range(self.inflight):
+            self.send_next()
+
+    def send_next(self):
+        seq = self.stats.next_seq()
+        if seq is None:
+            if not self.pending and not self.done:
+                self.done = True
+                self.stats.endpoint_done()
+            return
+        self.pending[seq] = time.perf_counter()
+        self.transport.sendto(f"Hello, server #{seq}".encode("utf-8"))
+
+    def datagram_received(self, data, addr):
+        now = time.perf_counter()
+        _, sep, tail = data.rpartition(b" #")
+        try:
+            seq = int(tail) if sep else -1
+        except ValueError:
+            seq = -1
+        sent_at = self.pending.pop(seq, None)
+        if sent_at is None:
+            # Unknown seq or a reply that already timed out
+            self.stats.late += 1
+            return
+        self.stats.rtts.append(now - sent_at)
+        self.send_next()
+
+    def error_received(self, exc):
+        self.stats.errors += 1
+
+    def expire(self):
+        """Count requests older than `timeout` as lost and replace them with new ones."""
+        deadline = time.perf_counter() - self.timeout
+        expired = []
+        # `pending` is ordered by send time, so stop at the first fresh entry
+        for seq, sent_at in self.pending.items():
+            if sent_at > deadline:
+                break
+            expired.append(seq)
+        for seq in expired:
+            del self.pending[seq]
+            self.stats.timeouts += 1
+            self.send_next()
+
+
+class LoadStats:
+    def __init__(self, total: int, endpoints: int):
+        self.total = total
+        self.sent = 0
+        self.rtts: list[float] = []
+        self.timeouts = 0
+        self.late = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._endpoints_left = endpoints
+        self.finished = asyncio.get_running_loop().create_future()
+
+    def next_seq(self) -> int | None:
+        if self.sent >= self.total:
+            return None
+        self.sent += 1
+        return self.sent
+
+    def endpoint_done(self):
+        self._endpoints_left -= 1
+        if self._endpoints_left == 0 and not self.finished.done():
+            self.finished.set_result(None)
+
+
+async def run_load(server, total: int, concurrency: int, endpoints: int, timeout: float) -> LoadStats:
+    loop = asyncio.get_running_loop()
+    stats = LoadStats(total, endpoints)
+    per_endpoint = max(1, concurrency // endpoints)
+
+    protocols = []
+    transports = []
+    started = time.perf_counter()
+    for _ in range(endpoints):
+        transport, proto = await loop.create_datagram_endpoint(
+            lambda: LoadProtocol(stats, per_endpoint, timeout),
+            remote_addr=server,
+        )
+        transports.append(transport)
+        protocols.append(proto)
+
+    try:
+        while not stats.finished.done():
+            await asyncio.wait({stats.finished}, timeout=timeout / 4)
+            for proto in protocols:
+                proto.expire()
+    finally:
+        stats.elapsed = time.perf_counter() - started
+        for transport in transports:
+            transport.close()
+    return stats
+
+
+def print_report(stats: LoadStats):
+    rtts = sorted(stats.rtts)
+    ok = len(rtts)
+    print(f"Sent {stats.sent}, replies {ok}, timeouts {stats.timeouts}, "
+          f"late/unknown {stats.late}, errors {stats.errors}")
+    print(f"Loss: {100 * (stats.sent - ok) / max(stats.sent, 1):.2f}%")
+    print(f"Throughput: {ok / stats.elapsed:.0f} replies/s over {stats.elapsed:.2f}s")
+    print("RTT: p50 {:.3f} ms, p99 {:.3f} ms, p999 {:.3f} ms".format(
+        percentile(rtts, 50) * 1000,
+        percentile(rtts, 99) * 1000,
+        percentile(rtts, 99.9) * 1000,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP hello client")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--load", action="store_true", help="run as a load generator")
+    parser.add_argument("--requests", type=int, default=100_000, help="total requests in load mode")
+    parser.add_argument("--concurrency", type=int, default=1000, help="requests kept in flight")
+    parser.add_argument("--endpoints", type=int, default=4, help="datagram endpoints sharing the load")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before a request counts as lost")
+    args = parser.parse_args()
+
+    # Define server
+    server = (args.host, args.port)
+    if not args.load:
+        main_once(server)
+        return
+
+    endpoints = max(1, min(args.endpoints, args.concurrency))
+    stats = asyncio.run(run_load(server, args.requests, args.concurrency, endpoints, args.timeout))
+    print_report(stats)
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,32 @@
+import argparse
+import multiprocessing
+import select
 import socket
+import time
 
 # Variables
 HOST = "127.0.0.1"
 PORT = 8080
 BUF_SIZE = 1024
+# Multi-worker mode
+BATCH_SIZE = 64          # max datagrams drained per wakeup
+REPORT_EVERY_SEC = 5.0   # how often each worker prints its rate
 
-def main():
+REPLY = "Hello, client".encode("utf-8")
+
+
+def make_reply(data: bytes) -> bytes:
+    """Reply to "Hello, server #<seq>" with "Hello, client #<seq>" so load tests can match answers."""
+    _, sep, seq = data.rpartition(b" #")
+    return REPLY + sep + seq if sep else REPLY
+
+
+def serve_single(host: str, port: int):
     # Create UDP connection
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
         # Listen on HOST:PORT
-        sock.bind((HOST, PORT))
-        print(f"UDP server listens on {HOST}:{PORT}")
+        sock.bind((host, port))
+        print(f"UDP server listens on {host}:{port}")
         try:
             while True:
                 # Receive data on socket
@@ -18,11 +34,92 @@ def main():
                 decoded_data = data.decode("utf-8")
                 print(f"Request from {client_address}: {decoded_data}")
 
-                reply = "Hello, client".encode("utf-8")
+                reply = make_reply(data)
                 sock.sendto(reply, client_address)
-                print(f"Sent {client_address}: Hello, client")
+                print(f"Sent {client_address}: {reply.decode('utf-8')}")
         except KeyboardInterrupt:
             print("\nShutting down")
 
+
+def serve_worker(idx: int, host: str, port: int, batch_size: int, report_every: float):
+    """One worker process: its own socket on the shared port, no per-packet prints."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # Every worker binds the same address; the kernel spreads datagrams between them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        recvfrom, sendto = sock.recvfrom, sock.sendto
+
+        total = 0
+        window = 0
+        window_start = time.monotonic()
+        try:
+            while True:
+                # Sleep until something arrives (or it's time to report)
+                if poller.poll(report_every * 1000):
+                    # Drain up to batch_size datagrams without blocking
+                    for _ in range(batch_size):
+                        try:
+                            data, client_address = recvfrom(BUF_SIZE, socket.MSG_DONTWAIT)
+                        except BlockingIOError:
+                            break
+                        sendto(make_reply(data), client_address)
+                        window += 1
+
+                now = time.monotonic()
+                if now - window_start >= report_every:
+                    total += window
+                    if window:
+                        print(f"[worker {idx}] {window / (now - window_start):.0f} pkt/s (total {total})", flush=True)
+                    window = 0
+                    window_start = now
+        except KeyboardInterrupt:
+            print(f"[worker {idx}] stopped, handled {total + window} packets", flush=True)
+
+
+def serve_workers(host: str, port: int, workers: int, batch_size: int, report_every: float):
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("SO_REUSEPORT is not supported on this platform")
+
+    procs = [
+        multiprocessing.Process(
+            target=serve_worker,
+            args=(i, host, port, batch_size, report_every),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    print(f"UDP server listens on {host}:{port} with {workers} workers")
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the workers too, let them print their totals
+        for p in procs:
+            p.join(timeout=1)
+        print("\nShutting down")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP hello server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of SO_REUSEPORT worker processes (0 = single verbose loop)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE,
+                        help="datagrams handled per wakeup in worker mode")
+    parser.add_argument("--report-every", type=float, default=REPORT_EVERY_SEC,
+                        help="seconds between pkt/s reports in worker mode")
+    args = parser.parse_args()
+
+    if args.workers > 0:
+        serve_workers(args.host, args.port, args.workers, args.batch, args.report_every)
+    else:
+        serve_single(args.host, args.port)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import random
+import time
+
+import server
+from server import CACHE, handle_batch, handle_line, np
+
+def make_lines(n: int, seed: int = 1) -> list[bytes]:
+    rnd = random.Random(seed)
+    # Mix of all cases: linear, degenerate, D>0, D=0, D<0
+    special = [b"0 0 0", b"0 0 5", b"0 2 -4", b"1 2 1", b"1 0 1"]
+    lines = []
+    for _ in range(n):
+        if rnd.random() < 0.05:
+            lines.append(rnd.choice(special))
+        else:
+            lines.append(f"{rnd.uniform(-100, 100)} {rnd.uniform(-100, 100)} {rnd.uniform(-100, 100)}".encode())
+    return lines
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized batch solve")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 200, 300, 1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if np is None:
+        print("NumPy is not installed: handle_batch uses the scalar path")
+    # Cache off: repeats would otherwise turn the scalar runs into cache hits.
+    # Vectorize every size, so the table shows where VECTORIZE_FROM belongs
+    CACHE.maxsize = 0
+    server.VECTORIZE_FROM = 0
+
+    print(f"{'batch':>8} {'scalar ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        lines = make_lines(n)
+        scalar = lambda: b"".join(handle_line(line) for line in lines)
+        vector = lambda: handle_batch(lines)
+        # Both paths must produce byte-identical responses
+        assert scalar() == vector(), "batch output differs from scalar output"
+        t_scalar = best_of(scalar, args.repeat)
+        t_vector = best_of(vector, args.repeat)
+        print(f"{n:>8} {t_scalar * 1000:>10.2f} {t_vector * 1000:>10.2f} {t_scalar / t_vector:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import free_port, wait_ready
+
+from client import run_stream
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    parser = argparse.ArgumentParser(description="Text vs binary protocol over a loopback connection")
+    parser.add_argument("--equations", type=int, default=200_000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 1000, 10_000])
+    args = parser.parse_args()
+
+    port = free_port()
+    # Cache off: every mode pays for the real solve
+    proc = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--cache-size", "0"],
+        cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        server = ("127.0.0.1", port)
+        print(f"{'batch':>7} {'lines/s':>10} {'BATCH/s':>10} {'binary/s':>10}")
+        for window in args.batches:
+            # Fewer equations for tiny windows, they're round-trip bound
+            n = min(args.equations, window * 20_000)
+            rates = [n / run_stream(server, n, window, mode) for mode in ("lines", "batch", "binary")]
+            print(f"{window:>7} " + " ".join(f"{r:>10.0f}" for r in rates))
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,176 @@
+import argparse
+import math
+import os
+import random
 import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from framing import LineFramer
 
 SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 8080
 ENC = "utf-8"
 
-def recv_until(sock: socket.socket, delim: bytes = b"\n", bufsize: int = 1024) -> bytes:
-    data = bytearray()
+# Binary framing (see server.py)
+BIN_MAGIC = 0xB5
+BIN_HEADER = struct.Struct("<BI")
+BIN_REQUEST = struct.Struct("<3d")
+BIN_RECORD = struct.Struct("<B3d")
+STATUS_NAMES = ("unlimited", "no solution", "linear", "two roots", "one root", "complex")
+
+def new_framer() -> LineFramer:
+    # Answers are returned with their "\n", like the server sends them
+    return LineFramer(keep_delim=True)
+
+def recv_until(sock: socket.socket, framer: LineFramer, bufsize: int = 64 * 1024) -> bytes:
+    """Return one message ending with the framer's delimiter; anything received after it stays buffered."""
     while True:
+        line = framer.next()
+        if line is not None:
+            return line
         chunk = sock.recv(bufsize)
         if not chunk:
-            break
-        data += chunk
-        if delim in chunk:
-            break
-    return bytes(data)
+            # Peer closed: hand back whatever is left
+            return framer.rest()
+        framer.feed(chunk)
 
-def main():
+def recv_exact(sock: socket.socket, framer: LineFramer, n: int, bufsize: int = 64 * 1024) -> bytes:
+    """Return exactly n bytes (fewer only if the peer closed); the rest stays buffered."""
+    while len(framer) < n:
+        chunk = sock.recv(bufsize)
+        if not chunk:
+            return framer.rest()
+        framer.feed(chunk)
+    return framer.take(n)
+
+def encode_binary(triples: list[tuple[float, float, float]]) -> bytes:
+    pack = BIN_REQUEST.pack
+    return BIN_HEADER.pack(BIN_MAGIC, len(triples)) + b"".join(pack(*t) for t in triples)
+
+def recv_binary(sock: socket.socket, framer: LineFramer) -> list[tuple[int, float, float, float]]:
+    header = recv_exact(sock, framer, BIN_HEADER.size)
+    if len(header) < BIN_HEADER.size or header[0] != BIN_MAGIC:
+        # The server answers protocol errors with a text "ERR: ..." line
+        raise ConnectionError((header + recv_until(sock, framer)).decode(ENC, errors="replace").strip())
+    _, n = BIN_HEADER.unpack(header)
+    body = recv_exact(sock, framer, n * BIN_RECORD.size)
+    if len(body) < n * BIN_RECORD.size:
+        raise ConnectionError("server closed the connection")
+    return list(BIN_RECORD.iter_unpack(body))
+
+def describe_record(status: int, r1: float, r2: float, d: float) -> str:
+    values = ", ".join(f"{k} = {v}" for k, v in (("r1", r1), ("r2", r2), ("D", d)) if not math.isnan(v))
+    return f"{STATUS_NAMES[status]}: {values}" if values else STATUS_NAMES[status]
+
+def random_triples(n: int, seed: int = 1) -> list[tuple[float, float, float]]:
+    rnd = random.Random(seed)
+    return [
+        (float(rnd.randint(-100, 100)), float(rnd.randint(-100, 100)), float(rnd.randint(-100, 100)))
+        for _ in range(n)
+    ]
+
+def random_equations(n: int, seed: int = 1) -> list[bytes]:
+    return [f"{a:g} {b:g} {c:g}\n".encode(ENC) for a, b, c in random_triples(n, seed)]
+
+def run_stream(server, n: int, window: int, mode: str = "lines") -> float:
+    """Pipeline n random equations over one connection, `window` equations per write.
+
+    mode: "lines" - plain "a b c" lines, "batch" - one "BATCH <n>" request
+    per window, "binary" - one binary frame per window.
+    """
+    if mode == "binary":
+        triples = random_triples(n)
+        requests = [encode_binary(triples[i:i + window]) for i in range(0, n, window)]
+    else:
+        equations = random_equations(n)
+        requests = []
+        for i in range(0, n, window):
+            chunk = equations[i:i + window]
+            header = f"BATCH {len(chunk)}\n".encode(ENC) if mode == "batch" else b""
+            requests.append(header + b"".join(chunk))
+
+    framer = new_framer()
+    started = time.perf_counter()
+    with socket.create_connection(server) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for i, request in zip(range(0, n, window), requests):
+            sock.sendall(request)
+            # Read the answers before sending more, so neither side blocks on a full buffer
+            if mode == "binary":
+                recv_binary(sock, framer)
+                continue
+            for _ in range(min(window, n - i)):
+                if not recv_until(sock, framer):
+                    raise ConnectionError("server closed the connection")
+    return time.perf_counter() - started
+
+def run_reconnect(server, equations: list[bytes]) -> float:
+    """Old behaviour for comparison: a new connection per equation."""
+    started = time.perf_counter()
+    for eq in equations:
+        with socket.create_connection(server) as sock:
+            sock.sendall(eq)
+            recv_until(sock, new_framer())
+    return time.perf_counter() - started
+
+def main_interactive(server, binary: bool = False):
     print("Solving a*x^2 + b*x + c = 0")
     a = input("a = ").strip()
     b = input("b = ").strip()
     c = input("c = ").strip()
 
+    if binary:
+        with socket.create_connection(server) as sock:
+            sock.sendall(encode_binary([(float(a), float(b), float(c))]))
+            (record,) = recv_binary(sock, new_framer())
+            print(describe_record(*record))
+        return
+
     # Encode message to send it with socket
     encoded_data = f"{a} {b} {c}\n".encode(ENC)
 
-    with socket.create_connection((SERVER_HOST, SERVER_PORT)) as sock:
+    with socket.create_connection(server) as sock:
         # Send encoded data to server
         sock.sendall(encoded_data)
-        resp = recv_until(sock, b"\n")
+        resp = recv_until(sock, new_framer())
         if not resp:
             print("Empte response.")
             return
         print(resp.decode(ENC).strip())
 
+def main():
+    parser = argparse.ArgumentParser(description="Quadratic equation client")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--stream", type=int, metavar="N",
+                        help="send N random equations over one connection and report solves/s")
+    parser.add_argument("--window", type=int, default=1000,
+                        help="equations pipelined per write in stream mode")
+    parser.add_argument("--batch", action="store_true",
+                        help="with --stream: send every window as one BATCH request")
+    parser.add_argument("--binary", action="store_true",
+                        help="use the binary protocol (with --stream: one frame per window)")
+    parser.add_argument("--reconnect", action="store_true",
+                        help="with --stream: open a new connection per equation (baseline)")
+    args = parser.parse_args()
+
+    server = (args.host, args.port)
+    if args.stream is None:
+        main_interactive(server, args.binary)
+        return
+
+    if args.reconnect:
+        elapsed = run_reconnect(server, random_equations(args.stream))
+        desc = "one connection per equation"
+    else:
+        mode = "binary" if args.binary else "batch" if args.batch else "lines"
+        elapsed = run_stream(server, args.stream, max(1, args.window), mode)
+        desc = f"one connection, {mode} of {args.window}"
+    print(f"Solved {args.stream} equations in {elapsed:.3f}s ({desc}): "
+          f"{args.stream / elapsed:.0f} solves/s")
+
 if __name__ == "__main__":
     main()
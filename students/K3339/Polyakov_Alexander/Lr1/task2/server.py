@@ -1,25 +1,57 @@
+import argparse
+import selectors
 import socket
 import math
-import json
+import struct
+import time
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # batches fall back to the scalar solver
+    np = None
 
 HOST = "127.0.0.1"
 PORT = 8080
 ENC = "utf-8"
 
-# We decide on format of data incoming: "a b c\n"
-# And to keep integrity of packages, delimeter all packages with "\n"
-def recv_until(sock: socket.socket, delim: bytes = b"\n", bufsize: int = 1024) -> bytes:
-    buf = bytearray()
-    while True:
-        # Receibe exactly N bytes
-        chunk = sock.recv(bufsize)
-        if not chunk:
-            break
-        buf += chunk
-        # If "\n" in data, understand that it is last chunk
-        if delim in chunk:
-            break
-    return bytes(buf)
+RECV_SIZE = 64 * 1024
+
+# Limits against slow or malicious clients
+MAX_LINE = 4 * 1024                 # longest allowed request line
+MAX_PENDING = 16 * 1024 * 1024      # unanswered input kept per connection (incomplete batch)
+MAX_OUTBUF = 4 * 1024 * 1024        # stop reading a client that doesn't read its answers
+READ_TIMEOUT = 10.0                 # a started request must complete within this time
+IDLE_TIMEOUT = 60.0                 # close connections silent for this long
+
+CACHE_SIZE = 4096  # encoded responses kept for repeated equations (0 disables)
+
+# Batch request: "BATCH <n>\n" followed by n "a b c\n" lines
+BATCH_PREFIX = b"BATCH"
+# Room per batch line: three shortest-repr doubles (24 chars max), 2 spaces, "\n".
+# A batch of MAX_BATCH such lines always fits in MAX_PENDING with its header
+BATCH_LINE_BYTES = 80
+MAX_BATCH = (MAX_PENDING - MAX_LINE) // BATCH_LINE_BYTES
+# Smaller batches are faster through the scalar path; bench_batch.py puts the
+# crossover between 200 and 300 lines (text) and near 200 triples (binary)
+VECTORIZE_FROM = 256
+
+# Binary framing, detected by the first byte of a request (never starts valid UTF-8 text):
+#   request:  0xB5, uint32 n, n * (a, b, c) as little-endian doubles
+#   response: 0xB5, uint32 n, n * (uint8 status, r1, r2, D) as little-endian doubles
+BIN_MAGIC = 0xB5
+BIN_HEADER = struct.Struct("<BI")
+BIN_REQUEST = struct.Struct("<3d")
+BIN_RECORD = struct.Struct("<B3d")
+MAX_BIN_BATCH = (MAX_PENDING - BIN_HEADER.size) // BIN_REQUEST.size
+
+# Result kinds; also the status byte of binary answers (unused values are NaN)
+ST_UNLIMITED = 0   # a = b = c = 0
+ST_NO_SOLUTION = 1  # a = b = 0, c != 0
+ST_LINEAR = 2      # r1 = x
+ST_TWO_ROOTS = 3   # r1 = x1 <= r2 = x2, D
+ST_ONE_ROOT = 4    # r1 = x, D = 0
+ST_COMPLEX = 5     # r1 = re, r2 = im, D (also for NaN discriminants)
 
 def solve_quadratic(a: float, b: float, c: float) -> str:
     if a == 0.0:
@@ -44,41 +76,465 @@ def solve_quadratic(a: float, b: float, c: float) -> str:
         im =  sqrt_abs / (2*a)
         return f"Complex solutions: {re} ± {im}i (D = {D})"
 
+class ResponseCache:
+    """Bounded LRU of encoded "OK: ..." lines keyed on the coefficient triple."""
+
+    # Packing the doubles normalizes "1", "1.0" and "1e0" to one key while
+    # keeping 0.0 and -0.0 apart (they give different answers, but are equal as dict keys)
+    _key = struct.Struct("<3d").pack
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[bytes, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, a: float, b: float, c: float) -> bytes:
+        """Return the encoded response for (a, b, c), solving it on a miss."""
+        if self.maxsize <= 0:
+            return ("OK: " + solve_quadratic(a, b, c) + "\n").encode(ENC)
+        key = self._key(a, b, c)
+        resp = self._data.get(key)
+        if resp is not None:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return resp
+        self.misses += 1
+        resp = ("OK: " + solve_quadratic(a, b, c) + "\n").encode(ENC)
+        self._data[key] = resp
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        return resp
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        ratio = 100 * self.hits / total if total else 0.0
+        return (f"cache: {len(self._data)}/{self.maxsize} entries, hits {self.hits}, "
+                f"misses {self.misses}, evictions {self.evictions}, hit ratio {ratio:.1f}%")
+
+CACHE = ResponseCache(CACHE_SIZE)
+
+def handle_line(line: bytes) -> bytes:
+    """Solve one "a b c" request line and return the encoded response line."""
+    try:
+        # Get a,b,c from string
+        parts = line.decode(ENC).split()
+        a, b, c = map(float, parts[:3])
+        # Solve equation (or take the ready answer from the cache)
+        return CACHE.get(a, b, c)
+    except Exception as e:
+        return (f"ERR: {e}\n").encode(ENC)
+
+def solve_quadratic_record(a: float, b: float, c: float) -> tuple[int, float, float, float]:
+    """solve_quadratic for the binary protocol: (status, r1, r2, D) instead of text."""
+    nan = math.nan
+    if a == 0.0:
+        if b == 0.0:
+            return (ST_UNLIMITED if c == 0.0 else ST_NO_SOLUTION), nan, nan, nan
+        return ST_LINEAR, -c / b, nan, nan
+
+    D = b*b - 4*a*c
+    if D > 0:
+        sqrtD = math.sqrt(D)
+        x1 = (-b - sqrtD) / (2*a)
+        x2 = (-b + sqrtD) / (2*a)
+        x1, x2 = (x1, x2) if x1 <= x2 else (x2, x1)
+        return ST_TWO_ROOTS, x1, x2, D
+    elif D == 0:
+        return ST_ONE_ROOT, -b / (2*a), nan, D
+    else:
+        return ST_COMPLEX, -b / (2*a), math.sqrt(-D) / (2*a), D
+
+# Result templates per kind, "%r" of a float is the same text as f"{x}"
+_BATCH_FORMATS = (
+    "Unlimited number of solutions",          # ST_UNLIMITED
+    "No solution",                            # ST_NO_SOLUTION
+    "x = %r",                                 # ST_LINEAR
+    "x1 = %r, x2 = %r (D = %r)",              # ST_TWO_ROOTS
+    "x = %r (D = 0)",                         # ST_ONE_ROOT
+    "Complex solutions: %r ± %ri (D = %r)",   # ST_COMPLEX
+)
+
+def _solve_arrays(a, b, c):
+    """Discriminants and all candidate roots for whole arrays, plus the ST_* kind of each row."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        D = b*b - 4*a*c
+        two_a = 2*a
+        sqrt_abs = np.sqrt(np.abs(D))
+        x1 = (-b - sqrt_abs) / two_a
+        x2 = (-b + sqrt_abs) / two_a
+        # Same ordering rule as the scalar code (NaN compares as "swap")
+        swap = ~(x1 <= x2)
+        lo = np.where(swap, x2, x1)
+        hi = np.where(swap, x1, x2)
+        re = -b / two_a
+        im = sqrt_abs / two_a
+        x_lin = -c / b
+
+    kind = np.select(
+        [(a == 0) & (b == 0) & (c == 0), (a == 0) & (b == 0), a == 0, D > 0, D == 0],
+        [ST_UNLIMITED, ST_NO_SOLUTION, ST_LINEAR, ST_TWO_ROOTS, ST_ONE_ROOT],
+        default=ST_COMPLEX,
+    )
+    return kind, D, lo, hi, re, im, x_lin
+
+def solve_quadratic_batch(a, b, c, template: str = "%s") -> list[str]:
+    """Vectorized solve_quadratic: same strings, same order, one NumPy pass.
+
+    Each result is wrapped into `template` (e.g. "OK: %s\n").
+    """
+    kind, D, lo, hi, re, im, x_lin = _solve_arrays(a, b, c)
+    args_by_kind = (
+        (), (), (x_lin,), (lo, hi, D), (re,), (re, im, D),
+    )
+
+    # Format every case as a group (C-level map over plain Python floats)
+    out = np.empty(len(kind), dtype=object)
+    for k, (fmt, args) in enumerate(zip(_BATCH_FORMATS, args_by_kind)):
+        idx = np.flatnonzero(kind == k)
+        if not len(idx):
+            continue
+        fmt = template % fmt
+        if args:
+            columns = [col[idx].tolist() for col in args]
+            out[idx] = list(map(fmt.__mod__, zip(*columns)))
+        else:
+            out[idx] = fmt
+    return out.tolist()
+
+def handle_batch(lines: list[bytes]) -> bytes:
+    """Answer a batch of "a b c" lines, one response line per request line."""
+    if np is None or len(lines) < VECTORIZE_FROM:
+        return b"".join(map(handle_line, lines))
+
+    # Fast path: every line is exactly three tokens
+    if list(map(len, map(bytes.split, lines))).count(3) == len(lines):
+        try:
+            coef = np.fromiter(map(float, b" ".join(lines).split()), dtype=np.float64,
+                               count=3 * len(lines)).reshape(-1, 3)
+        except ValueError:
+            # Some token isn't a number - the scalar path reports it per line
+            return b"".join(map(handle_line, lines))
+        return "".join(solve_quadratic_batch(coef[:, 0], coef[:, 1], coef[:, 2], "OK: %s\n")).encode(ENC)
+
+    # Irregular lines: vectorize the ones with enough tokens, the rest go through handle_line
+    results: list[bytes | None] = [None] * len(lines)
+    idx = []
+    flat = []
+    for i, line in enumerate(lines):
+        parts = line.split()
+        if len(parts) < 3:
+            results[i] = handle_line(line)
+            continue
+        idx.append(i)
+        flat.extend(parts[:3])
+    try:
+        coef = np.fromiter(map(float, flat), dtype=np.float64, count=len(flat)).reshape(-1, 3)
+    except ValueError:
+        return b"".join(map(handle_line, lines))
+    solved = solve_quadratic_batch(coef[:, 0], coef[:, 1], coef[:, 2], "OK: %s\n")
+    for i, result in zip(idx, solved):
+        results[i] = result.encode(ENC)
+    return b"".join(results)
+
+def solve_quadratic_records(coef) -> bytes:
+    """Vectorized solve_quadratic_record for an (n, 3) array; returns packed BIN_RECORDs."""
+    kind, D, lo, hi, re, im, x_lin = _solve_arrays(coef[:, 0], coef[:, 1], coef[:, 2])
+    nan = np.nan
+    records = np.empty(len(kind), dtype=np.dtype([("status", "u1"), ("r1", "<f8"), ("r2", "<f8"), ("d", "<f8")]))
+    records["status"] = kind
+    records["r1"] = np.select([kind == ST_LINEAR, kind == ST_TWO_ROOTS, kind >= ST_ONE_ROOT], [x_lin, lo, re], nan)
+    records["r2"] = np.select([kind == ST_TWO_ROOTS, kind == ST_COMPLEX], [hi, im], nan)
+    records["d"] = np.where(kind >= ST_TWO_ROOTS, D, nan)
+    return records.tobytes()
+
+def handle_binary(payload: bytes, n: int) -> bytes:
+    """Answer one binary frame with `n` packed (a, b, c) triples."""
+    header = BIN_HEADER.pack(BIN_MAGIC, n)
+    if np is not None and n >= VECTORIZE_FROM:
+        coef = np.frombuffer(payload, dtype="<f8", count=3 * n).reshape(-1, 3)
+        return header + solve_quadratic_records(coef)
+    pack = BIN_RECORD.pack
+    return header + b"".join(pack(*solve_quadratic_record(a, b, c)) for a, b, c in BIN_REQUEST.iter_unpack(payload))
+
+class BatchScan:
+    """How far the lines of a not yet complete BATCH request have been counted.
+
+    `scanned` is an offset from the batch header, so it stays valid when
+    the bytes in front of the header are dropped from the buffer.
+    """
+    __slots__ = ("scanned", "found")
+
+    def __init__(self):
+        self.scanned = 0
+        self.found = 0
+
+# We decide on format of data incoming: "a b c\n"
+# And to keep integrity of packages, delimeter all packages with "\n".
+# A connection stays open and may carry many (pipelined) lines.
+def process_buffer(buf: bytearray, scan: BatchScan) -> tuple[bytes, int]:
+    """Answer every complete request in `buf` and drop them from it.
+
+    Returns the response bytes and the number of answered equations.
+    Whatever follows the last complete request (a partial line, a batch
+    whose lines haven't all arrived yet, or a partial binary frame) stays
+    in `buf` until more bytes arrive; `scan` remembers how much of a
+    pending batch was already counted, so each byte is looked at once.
+    """
+    out = []
+    answered = 0
+    start = 0
+    while True:
+        if start < len(buf) and buf[start] == BIN_MAGIC:
+            if len(buf) - start < BIN_HEADER.size:
+                break
+            _, n = BIN_HEADER.unpack_from(buf, start)
+            if n > MAX_BIN_BATCH:
+                break  # buffer_error() reports it
+            frame_end = start + BIN_HEADER.size + n * BIN_REQUEST.size
+            if len(buf) < frame_end:
+                break
+            out.append(handle_binary(bytes(buf[start + BIN_HEADER.size:frame_end]), n))
+            answered += n
+            start = frame_end
+            continue
+
+        end = buf.find(b"\n", start)
+        if end == -1:
+            break
+        line = bytes(buf[start:end])
+        if line.startswith(BATCH_PREFIX):
+            try:
+                n = int(line[len(BATCH_PREFIX):])
+                if not 0 <= n <= MAX_BATCH:
+                    raise ValueError
+            except ValueError:
+                out.append(b"ERR: bad batch header\n")
+                answered += 1
+                start = end + 1
+                continue
+            # Wait until all n lines of the batch have arrived, counting only new bytes
+            if scan.scanned <= end - start:
+                scan.scanned, scan.found = end + 1 - start, 0
+            scan.found += buf.count(b"\n", start + scan.scanned)
+            scan.scanned = len(buf) - start
+            if scan.found < n:
+                break
+            scan.scanned = scan.found = 0
+            body_end = end
+            for _ in range(n):
+                body_end = buf.find(b"\n", body_end + 1)
+            if n:
+                out.append(handle_batch(bytes(buf[end + 1:body_end]).split(b"\n")))
+                answered += n
+            start = body_end + 1
+            continue
+        start = end + 1
+        # Blank lines get an ERR too: every line has exactly one answer
+        out.append(handle_line(line))
+        answered += 1
+    if start:
+        del buf[:start]
+    return b"".join(out), answered
+
+def buffer_error(buf: bytearray) -> bytes | None:
+    """Check what's left in `buf` after process_buffer(); returns an ERR line if a limit is broken."""
+    if buf[:1] == bytes((BIN_MAGIC,)):
+        # A pending binary frame: its size is bounded by the header
+        if len(buf) >= BIN_HEADER.size and BIN_HEADER.unpack_from(buf)[1] > MAX_BIN_BATCH:
+            return b"ERR: binary frame too large\n"
+        return None
+    if len(buf) - (buf.rfind(b"\n") + 1) > MAX_LINE:
+        return b"ERR: line too long\n"
+    if len(buf) > MAX_PENDING:
+        return b"ERR: request too large\n"
+    return None
+
+def serve_connection(conn: socket.socket, addr):
+    buf = bytearray()
+    scan = BatchScan()
+    served = 0
+    conn.settimeout(IDLE_TIMEOUT)
+    while True:
+        try:
+            chunk = conn.recv(RECV_SIZE)
+        except OSError:  # includes timeout
+            break
+        if not chunk:
+            break
+        buf += chunk
+        # One sendall for all answers from this chunk
+        resp, answered = process_buffer(buf, scan)
+        error = buffer_error(buf)
+        if error:
+            resp += error
+        if resp:
+            try:
+                conn.sendall(resp)
+            except OSError:
+                break
+            served += answered
+        if error:
+            break
+    print(f"Connection {addr} closed, {served} requests served")
+
+def serve_sequential(srv: socket.socket):
+    while True:  # concurrently with 1 client
+
+        # Accept connection from client
+        conn, addr = srv.accept()
+        with conn:
+            print(f"Connection from {addr}")
+            # Keep the connection until the client closes it
+            serve_connection(conn, addr)
+
+class Connection:
+    """State of one client in the selectors loop."""
+    __slots__ = ("sock", "addr", "inbuf", "scan", "outbuf", "deadline", "served", "reading", "closing")
+
+    def __init__(self, sock: socket.socket, addr):
+        self.sock = sock
+        self.addr = addr
+        self.inbuf = bytearray()
+        self.scan = BatchScan()
+        self.outbuf = bytearray()
+        self.deadline = time.monotonic() + IDLE_TIMEOUT
+        self.served = 0
+        self.reading = True
+        self.closing = False  # close once outbuf is flushed
+
+def serve_selectors(srv: socket.socket):
+    """Serve many clients from one thread with non-blocking sockets."""
+    sel = selectors.DefaultSelector()
+    srv.setblocking(False)
+    sel.register(srv, selectors.EVENT_READ)
+    conns: dict[socket.socket, Connection] = {}
+
+    def update_events(c: Connection):
+        events = (selectors.EVENT_READ if c.reading else 0) | (selectors.EVENT_WRITE if c.outbuf else 0)
+        if events:
+            sel.modify(c.sock, events, c)
+        else:
+            # Not reading and nothing to write: only possible while closing
+            close(c)
+
+    def close(c: Connection):
+        if conns.pop(c.sock, None) is None:
+            return
+        sel.unregister(c.sock)
+        c.sock.close()
+        print(f"Connection {c.addr} closed, {c.served} requests served")
+
+    def on_read(c: Connection):
+        try:
+            chunk = c.sock.recv(RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            close(c)
+            return
+        had_partial = bool(c.inbuf)
+        c.inbuf += chunk
+        resp, answered = process_buffer(c.inbuf, c.scan)
+        error = buffer_error(c.inbuf)
+        if resp:
+            c.outbuf += resp
+            c.served += answered
+        if error:
+            c.outbuf += error
+            c.reading = False
+            c.closing = True
+        elif not c.inbuf:
+            c.deadline = time.monotonic() + IDLE_TIMEOUT
+        elif not had_partial or resp:
+            # A new request started: it gets READ_TIMEOUT to complete, extra bytes don't extend it
+            c.deadline = time.monotonic() + READ_TIMEOUT
+        if len(c.outbuf) > MAX_OUTBUF:
+            c.reading = False
+        on_write(c)
+
+    def on_write(c: Connection):
+        if c.outbuf:
+            try:
+                sent = c.sock.send(c.outbuf)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                close(c)
+                return
+            del c.outbuf[:sent]
+        if not c.closing and not c.reading and len(c.outbuf) <= MAX_OUTBUF // 2:
+            c.reading = True
+        if c.closing and not c.outbuf:
+            close(c)
+            return
+        update_events(c)
+
+    next_sweep = time.monotonic() + 1.0
+    try:
+        while True:
+            for key, mask in sel.select(timeout=1.0):
+                if key.data is None:
+                    # New clients
+                    try:
+                        sock, addr = srv.accept()
+                    except BlockingIOError:
+                        continue
+                    sock.setblocking(False)
+                    c = Connection(sock, addr)
+                    conns[sock] = c
+                    sel.register(sock, selectors.EVENT_READ, c)
+                    continue
+                c = key.data
+                if mask & selectors.EVENT_READ and c.sock in conns:
+                    on_read(c)
+                if mask & selectors.EVENT_WRITE and c.sock in conns:
+                    on_write(c)
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + 1.0
+                for c in [c for c in conns.values() if c.deadline <= now]:
+                    close(c)
+    finally:
+        for c in list(conns.values()):
+            close(c)
+        sel.close()
+
 def main():
+    parser = argparse.ArgumentParser(description="TCP quadratic equation solver")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=("selectors", "sequential"), default="selectors",
+                        help="serve many clients in one selectors loop, or one client at a time")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="LRU entries for repeated equations (0 disables the cache)")
+    args = parser.parse_args()
+    CACHE.maxsize = args.cache_size
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as srv:
-        # srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
         # Bind server on port
-        srv.bind((HOST, PORT))
-        # Set queue of clients to 1 - we can process only 1 at a time (right now without threading)
-        srv.listen(1)
-        print(f"TCP-server listening on {HOST}:{PORT}")
+        srv.bind((args.host, args.port))
+        srv.listen(128)
+        print(f"TCP-server listening on {args.host}:{args.port} ({args.mode})")
         try:
-            while True:  # concurrently with 1 client
-
-                # Accept connection from client
-                conn, addr = srv.accept()
-                with conn:
-                    # Get all data
-                    raw = recv_until(conn, b"\n")
-                    print(f"Request from {addr}: {raw}")
-                    if not raw:
-                        continue
-                    try:
-                        # Get a,b,c from string
-                        parts = raw.decode(ENC).strip().split()
-                        a, b, c = map(float, parts[:3])
-                        # Solve equation
-                        result = solve_quadratic(a, b, c)
-                        resp = ("OK: " + result + "\n").encode(ENC)
-                    except Exception as e:
-                        resp = (f"ERR: {e}\n").encode(ENC)
-
-                    print(f"Response to {addr}: {resp}")
-
-                    conn.sendall(resp)
+            if args.mode == "selectors":
+                serve_selectors(srv)
+            else:
+                serve_sequential(srv)
         except KeyboardInterrupt:
             print("\nShutting down...")
+        finally:
+            print(CACHE.stats())
 
 if __name__ == "__main__":
     main()
@@ -1,63 +1,638 @@
+import argparse
 import socket
+import gzip
+import mimetypes
 import os
-from datetime import datetime
-from email.utils import formatdate
+import posixpath
+import queue
+import selectors
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote, urlsplit
 
 HOST = "127.0.0.1"
 PORT = 8080
 ENC = "utf-8"
 
-INDEX_FILE = "index.html"
+# Отдаём только этот каталог, а не каталог со скриптом (иначе GET /server.py вернёт исходник)
+DOC_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+INDEX_FILE = "index.html"      # отдаётся для запросов к каталогу
 MAX_REQ_BYTES = 64 * 1024  # защитимся от очень длинных запросов
+SENDFILE_MIN = 256 * 1024  # файлы крупнее отдаём через sendfile, не держа их в памяти
+WORKERS = 64               # одновременно обрабатываемых запросов
+KEEPALIVE_TIMEOUT = 5      # сколько секунд ждём следующий запрос в соединении
+REQUEST_TIMEOUT = 10       # на чтение всего запроса, сколько бы кусков он ни шёл
+KEEPALIVE_MAX = 1000       # запросов на одно соединение
+RECV_SIZE = 16 * 1024
+GZIP_MIN = 256             # меньше этого сжимать бессмысленно
+CACHE_BYTES = 32 * 1024 * 1024  # суммарный объём тел в кэше
+CACHE_FILES = 1024              # и число файлов в нём
 
-def build_response(status: str, body: bytes, content_type: str = "text/html; charset=utf-8") -> bytes:
-    """Формируем HTTP/1.1-ответ с обязательными заголовками."""
+# Дополнения к mimetypes; text/* отдаём с charset
+MIME_TYPES = {
+    ".html": "text/html",
+    ".htm": "text/html",
+    ".css": "text/css",
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+    ".wasm": "application/wasm",
+    ".webp": "image/webp",
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+}
+COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/wasm")
+
+_date_cache = (0, "")
+
+def http_date() -> str:
+    """Значение заголовка Date; форматируем не чаще раза в секунду."""
+    global _date_cache
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache = (now, formatdate(timeval=now, usegmt=True))
+    return _date_cache[1]
+
+def build_headers(status: str, length: int | None, content_type: str | None = "text/html; charset=utf-8",
+                  keep_alive: bool = False, extra: list[str] | None = None) -> bytes:
     lines = [
         f"HTTP/1.1 {status}",
-        f"Date: {formatdate(timeval=None, usegmt=True)}",
+        f"Date: {http_date()}",
         "Server: MinimalSocketServer/1.0",
-        f"Content-Length: {len(body)}",
-        f"Content-Type: {content_type}",
-        "Connection: close",
-        "",  # пустая строка = конец заголовков
-        ""
     ]
-    headers = "\r\n".join(lines).encode("ascii")
-    return headers + body
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    if content_type is not None:
+        lines.append(f"Content-Type: {content_type}")
+    if extra:
+        lines += extra
+    if keep_alive:
+        lines += ["Connection: keep-alive", f"Keep-Alive: timeout={KEEPALIVE_TIMEOUT}, max={KEEPALIVE_MAX}"]
+    else:
+        lines.append("Connection: close")
+    lines += ["", ""]  # пустая строка = конец заголовков
+    return "\r\n".join(lines).encode("ascii")
+
+def build_response(status: str, body: bytes, content_type: str | None = "text/html; charset=utf-8",
+                   keep_alive: bool = False, extra: list[str] | None = None) -> bytes:
+    """Формируем HTTP/1.1-ответ с обязательными заголовками."""
+    return build_headers(status, len(body), content_type, keep_alive, extra) + body
+
+
+class BadRequest(Exception):
+    def __init__(self, status: str):
+        super().__init__(status)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method: str, target: str, version: str, headers: dict[str, str]):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+
+    @property
+    def keep_alive(self) -> bool:
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in conn
+        return "keep-alive" in conn
+
+
+def recv_before(conn: socket.socket, deadline: float) -> bytes | None:
+    """recv() не позже deadline (по time.monotonic()); None - время вышло.
+
+    Таймаут сокета отсчитывается заново на каждый recv, и клиент, который
+    шлёт по байту, держал бы поток сколько угодно. Здесь срок один на запрос.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    conn.settimeout(remaining)
+    try:
+        return conn.recv(RECV_SIZE)
+    except TimeoutError:
+        return None
+    except OSError:
+        return b""
+
+
+def read_request(conn: socket.socket, buf: bytearray, deadline: float) -> Request | None:
+    """Читаем заголовки запроса целиком (до пустой строки) не позже deadline.
+
+    Лишние байты (следующий запрос при pipelining) остаются в buf.
+    None - клиент закрыл соединение, так ничего и не прислав.
+    """
+    scan_from = 0
+    while True:
+        end = buf.find(b"\r\n\r\n", scan_from)
+        if end != -1:
+            break
+        if len(buf) > MAX_REQ_BYTES:
+            raise BadRequest("431 Request Header Fields Too Large")
+        scan_from = max(0, len(buf) - 3)
+        chunk = recv_before(conn, deadline)
+        if chunk is None:
+            if buf.strip():
+                raise BadRequest("408 Request Timeout")
+            return None
+        if not chunk:
+            if buf.strip():
+                raise BadRequest("400 Bad Request")
+            return None
+        buf += chunk
+    if end > MAX_REQ_BYTES:
+        raise BadRequest("431 Request Header Fields Too Large")
+
+    head = bytes(buf[:end]).decode("iso-8859-1")
+    del buf[:end + 4]
+    request_line, *header_lines = head.split("\r\n")
+    parts = request_line.split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise BadRequest("400 Bad Request")
+    headers = {}
+    for line in header_lines:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    req = Request(parts[0], parts[1], parts[2], headers)
+
+    # Тело нам не нужно, но его надо вычитать, чтобы не сбить следующий запрос
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise BadRequest("400 Bad Request")
+    if length < 0 or length > MAX_REQ_BYTES:
+        raise BadRequest("413 Payload Too Large")
+    while len(buf) < length:
+        chunk = recv_before(conn, deadline)
+        if chunk is None:
+            raise BadRequest("408 Request Timeout")
+        if not chunk:
+            raise BadRequest("400 Bad Request")
+        buf += chunk
+    del buf[:length]
+    # Ответ отправляем с обычным таймаутом на каждую операцию
+    conn.settimeout(KEEPALIVE_TIMEOUT)
+    return req
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """gzip разрешён в Accept-Encoding (и не выключен через q=0)."""
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+class FileVersion:
+    """Одна загруженная версия файла: тело, gzip-копия, валидаторы и готовые заголовки."""
+
+    def __init__(self, key: tuple[int, int], size: int, body: bytes | None, content_type: str):
+        mtime_ns, _ = key
+        self.key = key
+        self.size = size
+        self.body = body
+        self.content_type = content_type
+        self.mtime = mtime_ns // 1_000_000_000
+        self.last_modified = formatdate(timeval=self.mtime, usegmt=True)
+        self.etag = f'"{mtime_ns:x}-{size:x}"'
+        # Сжимаем один раз при загрузке, а не на каждый запрос
+        self.gzip_body = None
+        self.gzip_etag = None
+        if body is not None and len(body) >= GZIP_MIN and content_type.startswith(COMPRESSIBLE):
+            packed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(packed) < len(body):
+                self.gzip_body = packed
+                self.gzip_etag = f'"{mtime_ns:x}-{size:x}-gz"'
+        self._heads: dict[tuple[str, bool, bool], bytes] = {}
+        self._heads_date = ""
+
+    def not_modified(self, req: "Request") -> bool:
+        inm = req.headers.get("if-none-match")
+        if inm is not None:
+            # If-None-Match важнее If-Modified-Since
+            if inm.strip() == "*":
+                return True
+            tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+            return self.etag in tags or self.gzip_etag in tags
+        ims = req.headers.get("if-modified-since")
+        if ims:
+            try:
+                return self.mtime <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def range_applies(self, req: "Request") -> bool:
+        """If-Range: частичный ответ, только если клиент держит именно эту версию."""
+        if_range = req.headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            return if_range == self.etag
+        return if_range == self.last_modified
+
+    def head(self, status: str, gz: bool, keep_alive: bool) -> bytes:
+        date = http_date()
+        if date != self._heads_date:
+            self._heads = {}
+            self._heads_date = date
+        key = (status, gz, keep_alive)
+        head = self._heads.get(key)
+        if head is None:
+            extra = [
+                f"ETag: {self.gzip_etag if gz else self.etag}",
+                f"Last-Modified: {self.last_modified}",
+                "Accept-Ranges: bytes",
+            ]
+            if self.gzip_body is not None:
+                extra.append("Vary: Accept-Encoding")
+            if gz:
+                extra.append("Content-Encoding: gzip")
+            if status.startswith("304"):
+                head = build_headers(status, None, None, keep_alive, extra)
+            else:
+                length = len(self.gzip_body) if gz else self.size
+                head = build_headers(status, length, self.content_type, keep_alive, extra)
+            self._heads[key] = head
+        return head
+
+
+class CachedFile:
+    """Готовый ответ для статического файла.
+
+    Заголовки и тело лежат в памяти и перечитываются только при смене
+    mtime/size файла; заголовки пересобираются раз в секунду ради Date.
+    Большие файлы (от SENDFILE_MIN) в память не читаем - их отдаёт sendfile.
+    """
+
+    def __init__(self, path: str, content_type: str = "text/html; charset=utf-8"):
+        self.path = path
+        self.content_type = content_type
+        self.version: FileVersion | None = None
+        # Перечитывает файл только один поток; остальные видят старую или новую версию целиком
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Один stat() на запрос; False, если файла нет."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode):
+            return False
+        key = (st.st_mtime_ns, st.st_size)
+        if self.version is None or self.version.key != key:
+            with self._lock:
+                if self.version is None or self.version.key != key:
+                    if st.st_size < SENDFILE_MIN:
+                        with open(self.path, "rb") as f:
+                            body = f.read()
+                        self.version = FileVersion(key, len(body), body, self.content_type)
+                    else:
+                        self.version = FileVersion(key, st.st_size, None, self.content_type)
+        return True
+
+    def memory(self) -> int:
+        v = self.version
+        if v is None or v.body is None:
+            return 0
+        return len(v.body) + (len(v.gzip_body) if v.gzip_body is not None else 0)
 
+    def send(self, conn: socket.socket, req: "Request", keep_alive: bool = False):
+        v = self.version
+        gz = v.gzip_body is not None and accepts_gzip(req.headers.get("accept-encoding", ""))
+        if v.not_modified(req):
+            conn.sendall(v.head("304 Not Modified", gz, keep_alive))
+            return
 
-def handle_client(conn: socket.socket, addr):
-    with conn:
-        request = conn.recv(1024).decode()
-        print(f'Request from {addr}:\n{request}')
+        range_header = req.headers.get("range")
+        if range_header is not None and v.range_applies(req):
+            byte_range = parse_range(range_header, v.size)
+            if byte_range is not None:
+                self.send_range(conn, req, v, byte_range, keep_alive)
+                return
 
-        if os.path.exists(INDEX_FILE) and os.path.isfile(INDEX_FILE):
-            with open(INDEX_FILE, "rb") as f:
-                body = f.read()
-            resp = build_response("200 OK", body, "text/html; charset=utf-8")
+        head = v.head("200 OK", gz, keep_alive)
+        if req.method == "HEAD":
+            conn.sendall(head)
+        elif gz:
+            conn.sendall(head + v.gzip_body)
+        elif v.body is not None:
+            conn.sendall(head + v.body)
         else:
-            body = (
-                "<!doctype html><html><head><meta charset='utf-8'>"
-                "<title>404 Not Found</title></head><body>"
-                "<h1>404 Not Found</h1><p>index.html не найден.</p>"
-                "</body></html>"
-            ).encode(ENC)
-            resp = build_response("404 Not Found", body, "text/html; charset=utf-8")
+            # Большой файл: ядро копирует его прямо в сокет
+            conn.sendall(head)
+            with open(self.path, "rb") as f:
+                conn.sendfile(f, 0, v.size)
 
-        conn.sendall(resp)
+    def send_range(self, conn: socket.socket, req: "Request", v: FileVersion,
+                   byte_range: tuple[int, int] | str, keep_alive: bool):
+        """206 для одного диапазона (всегда без сжатия) или 416."""
+        if byte_range == "unsatisfiable":
+            conn.sendall(build_headers(
+                "416 Range Not Satisfiable", 0, None, keep_alive, [f"Content-Range: bytes */{v.size}"],
+            ))
+            return
+        start, end = byte_range
+        length = end - start + 1
+        extra = [
+            f"Content-Range: bytes {start}-{end}/{v.size}",
+            f"ETag: {v.etag}",
+            f"Last-Modified: {v.last_modified}",
+            "Accept-Ranges: bytes",
+        ]
+        if v.gzip_body is not None:
+            # Ответ на тот же URL зависит от Accept-Encoding, как и у 200
+            extra.append("Vary: Accept-Encoding")
+        head = build_headers("206 Partial Content", length, v.content_type, keep_alive, extra)
+        conn.sendall(head)
+        if req.method == "HEAD":
+            return
+        if v.body is not None:
+            conn.sendall(memoryview(v.body)[start:end + 1])
+        else:
+            # Только нужный кусок файла, без чтения в память
+            with open(self.path, "rb") as f:
+                conn.sendfile(f, start, length)
+
+
+def parse_range(value: str, size: int) -> tuple[int, int] | str | None:
+    """Range: bytes=a-b | a- | -n -> (start, end) включительно.
+
+    "unsatisfiable" - диапазон за пределами файла (416); None - заголовок
+    не понят или диапазонов несколько, тогда отдаём файл целиком (200).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if start < size and end < start:
+                return None
+        else:
+            suffix = int(last)
+            if suffix == 0:
+                return "unsatisfiable"
+            start = max(0, size - suffix)
+            end = size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def guess_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    ctype = MIME_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/json", "image/svg+xml"):
+        ctype += "; charset=utf-8"
+    return ctype
+
+
+class FileCache:
+    """LRU из CachedFile: горячие мелкие файлы живут в памяти, объём ограничен CACHE_BYTES."""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES, max_files: int = CACHE_FILES):
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._files: OrderedDict[str, CachedFile] = OrderedDict()
+        self._memory: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CachedFile | None:
+        """Актуальная версия файла или None, если это не обычный файл."""
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None:
+                self._files.move_to_end(path)
+        if entry is None:
+            entry = CachedFile(path, guess_type(path))
+        if not entry.refresh():
+            with self._lock:
+                if self._files.pop(path, None) is not None:
+                    self._bytes -= self._memory.pop(path)
+            return None
+
+        with self._lock:
+            mem = entry.memory()
+            if path in self._files:
+                self._bytes += mem - self._memory[path]
+            else:
+                self._files[path] = entry
+                self._bytes += mem
+            self._memory[path] = mem
+            while self._files and (self._bytes > self.max_bytes or len(self._files) > self.max_files):
+                old_path, _ = self._files.popitem(last=False)
+                self._bytes -= self._memory.pop(old_path)
+        return entry
+
+
+def resolve_path(root: str, target: str) -> str | None:
+    """URL -> путь внутри root; None, если путь выходит за его пределы."""
+    try:
+        path = unquote(urlsplit(target).path)
+    except ValueError:  # например, "http://[/" - незакрытый IPv6-адрес
+        return None
+    if "\0" in path:
+        return None
+    # normpath убирает "..", realpath - символические ссылки наружу
+    path = posixpath.normpath("/" + path.lstrip("/"))
+    full = os.path.realpath(os.path.join(root, path.lstrip("/")))
+    if os.path.isdir(full):
+        # index.html тоже может оказаться ссылкой наружу
+        full = os.path.realpath(os.path.join(full, INDEX_FILE))
+    if full != root and not full.startswith(root + os.sep):
+        return None
+    return full
+
+
+CACHE = FileCache()
+
+NOT_FOUND_BODY = (
+    "<!doctype html><html><head><meta charset='utf-8'>"
+    "<title>404 Not Found</title></head><body>"
+    "<h1>404 Not Found</h1><p>Файл не найден.</p>"
+    "</body></html>"
+).encode(ENC)
+
+
+class Connection:
+    """Соединение между запросами: сокет, недочитанные байты и счётчик запросов."""
+    __slots__ = ("sock", "addr", "buf", "served", "idle_since")
+
+    def __init__(self, sock: socket.socket, addr):
+        self.sock = sock
+        self.addr = addr
+        self.buf = bytearray()
+        self.served = 0
+        self.idle_since = time.monotonic()
+
+    def close(self):
+        self.sock.close()
+        print(f"Connection {self.addr} closed, {self.served} requests")
+
+
+def handle_client(c: Connection, root: str, park):
+    """Обслуживаем пришедшие запросы, затем возвращаем соединение через park().
+
+    Поток пула занят, только пока есть запрос: молчащее keep-alive
+    соединение ждёт в селекторе главного потока, а не в recv().
+    """
+    conn = c.sock
+    parked = False
+    try:
+        while c.served < KEEPALIVE_MAX:
+            try:
+                req = read_request(conn, c.buf, time.monotonic() + REQUEST_TIMEOUT)
+            except BadRequest as e:
+                conn.settimeout(KEEPALIVE_TIMEOUT)  # после 408 от срока ничего не осталось
+                body = e.status.encode(ENC)
+                conn.sendall(build_response(e.status, body, "text/plain; charset=utf-8"))
+                break
+            if req is None:
+                break
+            c.served += 1
+            keep_alive = req.keep_alive and c.served < KEEPALIVE_MAX
+
+            if req.method not in ("GET", "HEAD"):
+                resp = build_response("405 Method Not Allowed", b"", None, keep_alive, ["Allow: GET, HEAD"])
+                conn.sendall(resp)
+            else:
+                path = resolve_path(root, req.target)
+                entry = CACHE.get(path) if path else None
+                if entry is not None:
+                    entry.send(conn, req, keep_alive)
+                else:
+                    resp = build_response("404 Not Found", NOT_FOUND_BODY, "text/html; charset=utf-8", keep_alive)
+                    conn.sendall(resp)
+            if not keep_alive:
+                break
+            if not c.buf:
+                # Следующего запроса ещё нет - ждать его будет селектор
+                park(c)
+                parked = True
+                return
+    except OSError:
+        pass
+    except Exception as e:
+        # future из пула никто не читает - иначе ошибка пропала бы молча
+        print(f"Unhandled error for {c.addr}: {e!r}")
+    finally:
+        if not parked:
+            c.close()
+
+
+def serve(srv: socket.socket, root: str):
+    """Главный поток: accept и ожидание запросов в селекторе; сами запросы - в пуле."""
+    sel = selectors.DefaultSelector()
+    srv.setblocking(False)
+    sel.register(srv, selectors.EVENT_READ)
+    # Поток пула кладёт соединение в очередь и будит select() байтом в socketpair
+    returned: queue.SimpleQueue[Connection] = queue.SimpleQueue()
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    sel.register(wake_r, selectors.EVENT_READ)
+    pool = ThreadPoolExecutor(max_workers=WORKERS)
+
+    def park(c: Connection):
+        returned.put(c)
+        try:
+            wake_w.send(b"\0")
+        except BlockingIOError:
+            pass  # буфер полон - select() проснётся и так
+
+    def wait_request(c: Connection):
+        c.idle_since = time.monotonic()
+        sel.register(c.sock, selectors.EVENT_READ, c)
+
+    next_sweep = time.monotonic() + 1.0
+    try:
+        while True:
+            for key, _ in sel.select(timeout=1.0):
+                if key.fileobj is srv:
+                    # Accept connection; до первого запроса оно тоже ждёт в селекторе
+                    try:
+                        conn, addr = srv.accept()
+                    except BlockingIOError:
+                        continue
+                    conn.setblocking(True)
+                    wait_request(Connection(conn, addr))
+                elif key.fileobj is wake_r:
+                    try:
+                        while wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    while True:
+                        try:
+                            wait_request(returned.get_nowait())
+                        except queue.Empty:
+                            break
+                else:
+                    # Пришёл запрос (или клиент закрылся) - дальше работает поток пула
+                    sel.unregister(key.fileobj)
+                    pool.submit(handle_client, key.data, root, park)
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + 1.0
+                idle = [key.data for key in sel.get_map().values()
+                        if isinstance(key.data, Connection) and now - key.data.idle_since >= KEEPALIVE_TIMEOUT]
+                for c in idle:
+                    sel.unregister(c.sock)
+                    c.close()
+    finally:
+        for key in list(sel.get_map().values()):
+            if isinstance(key.data, Connection):
+                key.data.close()
+        # Соединения в работе закроют сами потоки пула
+        pool.shutdown(wait=False, cancel_futures=True)
+        sel.close()
+        wake_r.close()
+        wake_w.close()
 
 
 def main():
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as srv:
+    parser = argparse.ArgumentParser(description="Static HTTP server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--root", default=DOC_ROOT, help="document root")
+    args = parser.parse_args()
+    root = os.path.realpath(args.root)
 
-        srv.bind((HOST, PORT))
-        srv.listen(50)  # очередь полу-соединений; обслуживаем всё равно последовательно
-        print(f"HTTP-server listens on http://{HOST}:{PORT}")
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as srv:
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        srv.bind((args.host, args.port))
+        srv.listen(512)
+        print(f"HTTP-server listens on http://{args.host}:{args.port}, root {root} ({WORKERS} workers)")
         try:
-            while True:
-                # Accept connection
-                conn, addr = srv.accept()
-                handle_client(conn, addr)
+            serve(srv, root)
         except KeyboardInterrupt:
             print("\nShutting down...")
 
@@ -0,0 +1,198 @@
+"""Headless load test for the chat server.
+
+Opens more and more simulated clients (all in #general), lets a few of
+them send timestamped messages at a fixed rate and measures how long each
+message takes to reach every other client:
+
+    python bench.py --clients 10,100,1000 --senders 10 --rate 20
+
+By default server.py is started on a free port so its memory can be read
+from /proc; pass --port (and optionally --pid) to test a running server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import free_port, percentile, raise_fd_limit, wait_ready
+
+from server import ENC
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TAG = "bench"
+
+
+def rss_kb(pid: int | None) -> int | None:
+    """Resident memory of a process and its children (workers) in KiB, Linux only."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    total = None
+    for p in (pid, *children):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total = (total or 0) + int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+class BenchClient:
+    def __init__(self, idx: int, latencies: list[float]):
+        self.idx = idx
+        self.latencies = latencies
+        self.received = 0
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.task: asyncio.Task | None = None
+
+    async def connect(self, server):
+        self.reader, self.writer = await asyncio.open_connection(*server)
+        self.send({"type": "hello", "name": f"{TAG}{self.idx}"})
+        self.task = asyncio.create_task(self.read_loop())
+
+    def send(self, obj: dict):
+        self.writer.write((json.dumps(obj) + "\n").encode(ENC))
+
+    def send_message(self, seq: int):
+        # The send time travels inside the message; every client lives in this process
+        self.send({"message": f"{TAG} {self.idx} {seq} {time.perf_counter()!r}"})
+
+    async def read_loop(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                now = time.perf_counter()
+                try:
+                    msg = json.loads(line)["message"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if isinstance(msg, str) and msg.startswith(TAG + " "):
+                    self.received += 1
+                    self.latencies.append(now - float(msg.rsplit(" ", 1)[1]))
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            # ValueError: a history replay line longer than the reader limit
+            pass
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+
+
+async def run_level(clients: list[BenchClient], senders: int, rate: float, duration: float, settle: float):
+    """Let the first `senders` clients talk at `rate` msg/s each for `duration` seconds."""
+    for c in clients:
+        c.latencies.clear()
+        c.received = 0
+    talkers = clients[:senders]
+    interval = 1 / rate
+    sent = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    seq = 0
+    next_at = started
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        for c in talkers:
+            c.send_message(seq)
+            sent += 1
+        seq += 1
+        next_at += interval
+    sending = time.perf_counter() - started
+    # Give the last messages time to arrive
+    await asyncio.sleep(settle)
+    elapsed = time.perf_counter() - started
+    received = sum(c.received for c in clients)
+    return sent, sent / sending, received, received / elapsed
+
+
+async def bench(server, levels: list[int], senders: int, rate: float, duration: float, settle: float, pid):
+    latencies: list[float] = []
+    clients: list[BenchClient] = []
+    base_rss = rss_kb(pid)
+    print(f"{'clients':>8} {'sent/s':>8} {'delivered/s':>12} {'complete':>9} {'p50 ms':>8} {'p99 ms':>8} {'RSS MiB':>8} {'+KiB/conn':>10}")
+    try:
+        for level in levels:
+            while len(clients) < level:
+                c = BenchClient(len(clients), latencies)
+                await c.connect(server)
+                clients.append(c)
+            await asyncio.sleep(0.2)  # let joins and history replays settle
+            talkers = min(senders, len(clients))
+            sent, sent_rate, received, delivered_rate = await run_level(clients, talkers, rate, duration, settle)
+            lat = sorted(latencies)
+            expected = sent * (len(clients) - 1)  # the sender doesn't get its own message
+            rss = rss_kb(pid)
+            rss_col = f"{rss / 1024:>8.1f}" if rss is not None else f"{'n/a':>8}"
+            per_conn = f"{(rss - base_rss) / len(clients):>10.1f}" if rss is not None and base_rss is not None else f"{'n/a':>10}"
+            print(f"{len(clients):>8} {sent_rate:>8.0f} {delivered_rate:>12.0f} "
+                  f"{100 * received / max(expected, 1):>8.1f}% "
+                  f"{percentile(lat, 50) * 1000:>8.2f} {percentile(lat, 99) * 1000:>8.2f} {rss_col} {per_conn}")
+    finally:
+        await asyncio.gather(*(c.close() for c in clients))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat server load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="with --port: server pid, to report its memory")
+    parser.add_argument("--clients", default="10,100,500",
+                        help="comma-separated connection counts, ramped up in order")
+    parser.add_argument("--senders", type=int, default=5, help="clients that send messages")
+    parser.add_argument("--rate", type=float, default=20, help="messages/s per sender")
+    parser.add_argument("--duration", type=float, default=3, help="seconds of sending per level")
+    parser.add_argument("--workers", type=int, default=0, help="start the server with this many workers")
+    parser.add_argument("--settle", type=float, default=1, help="seconds to wait for the last messages")
+    args = parser.parse_args()
+
+    levels = sorted(int(n) for n in args.clients.split(","))
+    raise_fd_limit()
+
+    proc = None
+    port, pid = args.port, args.pid
+    if port is None:
+        port = free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "server.py", "--port", str(port), "--workers", str(args.workers),
+             # measure fan-out, not flood control
+             "--msg-rate", "0", "--byte-rate", "0"],
+            cwd=HERE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        pid = proc.pid
+        wait_ready(port)
+    try:
+        asyncio.run(bench((args.host, port), levels, args.senders, args.rate, args.duration, args.settle, pid))
+    finally:
+        if proc is not None:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+if __name__ == "__main__":
+    main()
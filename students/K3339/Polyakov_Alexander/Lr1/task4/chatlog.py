@@ -0,0 +1,153 @@
+"""Append-only, segmented chat log for the chat server.
+
+Every remembered message is stored as one "room<TAB>line" record, where
+line is the NDJSON line the clients got. Records are buffered and written
+with a single write + fsync per sync() call, which the server runs
+periodically.
+
+Once segment_bytes of new records have been written to a segment, the
+next one starts with a copy of the in-memory history window. So the newest
+segment alone is enough to rebuild history, and a restart reads that one
+file however long the log gets. The copy itself doesn't count towards
+rotation, and its size is bounded by the server's history limits.
+"""
+import asyncio
+import mmap
+import os
+from collections import OrderedDict, deque
+
+SEGMENT_BYTES = 4 * 1024 * 1024
+SEGMENT_SUFFIX = ".log"
+
+
+class ChatLog:
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.pending: list[bytes] = []
+        self.history: dict[str, deque[bytes]] | None = None
+        self.fd: int | None = None
+        self.segment = 0
+        self.appended = 0  # record bytes in the current segment after its seed
+        self.syncing: asyncio.Future | None = None  # write() running in the executor
+
+    def segments(self) -> list[int]:
+        numbers = []
+        for entry in os.listdir(self.directory):
+            stem, ext = os.path.splitext(entry)
+            if ext == SEGMENT_SUFFIX and stem.isdigit():
+                numbers.append(int(stem))
+        return sorted(numbers)
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:06d}{SEGMENT_SUFFIX}")
+
+    def load(self, history_size: int) -> OrderedDict[str, deque[bytes]]:
+        """Rebuild the per-room history window from the newest segment.
+
+        Rooms come out least recently written first.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        history: OrderedDict[str, deque[bytes]] = OrderedDict()
+        segments = self.segments()
+        if not segments:
+            return history
+        with open(self.path(segments[-1]), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return history
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for record in iter(mm.readline, b""):
+                    if not record.endswith(b"\n"):
+                        break  # torn last write, see open()
+                    room, sep, line = record.partition(b"\t")
+                    if not sep:
+                        continue
+                    room = room.decode("utf-8", errors="replace")
+                    if room not in history:
+                        history[room] = deque(maxlen=history_size)
+                    else:
+                        history.move_to_end(room)
+                    history[room].append(line)
+        return history
+
+    def repair(self):
+        """Cut a half-written record left by a crash, so the next one starts clean.
+
+        Must run before anyone load()s: truncating a file that another
+        process has mmapped would crash that process (SIGBUS).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.segments()
+        if not segments:
+            return
+        path = self.path(segments[-1])
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(0, size - 64 * 1024))
+            tail = f.read()
+        cut = size - len(tail) + tail.rfind(b"\n") + 1
+        if cut < size:
+            os.truncate(path, cut)
+
+    def open(self, history: dict[str, deque[bytes]]):
+        """Start appending; `history` is what a new segment gets seeded with."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.history = history
+        segments = self.segments()
+        self.segment = segments[-1] if segments else 1
+        self.fd = os.open(self.path(self.segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        # Where its seed ends is unknown, so count the whole segment
+        self.appended = os.fstat(self.fd).st_size
+
+    def append(self, room: str, line: bytes):
+        self.pending.append(room.encode("utf-8") + b"\t" + line)
+
+    def snapshot(self) -> list[tuple[bytes, tuple[bytes, ...]]]:
+        """The history window as (record prefix, lines) pairs.
+
+        Only references are copied here, on the event loop thread, while
+        nothing else can touch the deques; write() joins them in the executor.
+        """
+        return [(room.encode("utf-8") + b"\t", tuple(lines)) for room, lines in self.history.items()]
+
+    def write(self, data: bytes, seed: list[tuple[bytes, tuple[bytes, ...]]] | None):
+        """Blocking part of a sync: write, fsync and maybe start a new segment."""
+        os.write(self.fd, data)
+        os.fsync(self.fd)
+        if seed is not None:
+            os.close(self.fd)
+            self.segment += 1
+            self.fd = os.open(self.path(self.segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            os.write(self.fd, b"".join(prefix + line for prefix, lines in seed for line in lines))
+            os.fsync(self.fd)
+
+    def take(self) -> tuple[bytes, list[tuple[bytes, tuple[bytes, ...]]] | None]:
+        """Pending records and, if the segment is full, the seed of the next one."""
+        data = b"".join(self.pending)
+        self.pending.clear()
+        self.appended += len(data)
+        if self.appended < self.segment_bytes:
+            return data, None
+        # Only records count towards the next rotation, never the seed itself
+        self.appended = 0
+        return data, self.snapshot()
+
+    async def sync(self):
+        if self.pending:
+            self.syncing = asyncio.get_running_loop().run_in_executor(None, self.write, *self.take())
+            # Shielded: cancelling the sync task must not drop a write that's already taken
+            await asyncio.shield(self.syncing)
+
+    async def close(self):
+        """Write what's left once a sync still running in the executor is done."""
+        if self.fd is None:
+            return
+        if self.syncing is not None:
+            try:
+                await self.syncing
+            except OSError as e:
+                print(f"Chat log: last sync failed: {e}")
+        if self.pending:
+            self.write(*self.take())
+        os.close(self.fd)
+        self.fd = None
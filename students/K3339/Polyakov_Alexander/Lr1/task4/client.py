@@ -1,7 +1,12 @@
+import os
 import socket
+import sys
 import threading
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from framing import LineFramer
+
 SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 7000
 ENC = "utf-8"
@@ -10,20 +15,24 @@ def send_json(sock: socket.socket, obj: dict):
     sock.sendall((json.dumps(obj, ensure_ascii=False) + "\n").encode(ENC))
 
 def recv_loop(sock: socket.socket):
-    buf = bytearray()
+    framer = LineFramer()
     try:
         while True:
             chunk = sock.recv(4096)
             if not chunk:
                 print("\n* Соединение закрыто сервером")
                 break
-            buf.extend(chunk)
-            while b"\n" in buf:
-                line, _, buf = buf.partition(b"\n")
+            framer.feed(chunk)
+            for line in framer:
                 try:
                     obj = json.loads(line.decode(ENC).strip())
                     if isinstance(obj, dict) and "name" in obj and "message" in obj:
-                        print(f"[{obj['name']}] {obj['message']}")
+                        if "to" in obj:
+                            print(f"[{obj['name']} -> {obj['to']}] {obj['message']}")
+                        elif "room" in obj:
+                            print(f"#{obj['room']} [{obj['name']}] {obj['message']}")
+                        else:
+                            print(f"[{obj['name']}] {obj['message']}")
                     else:
                         print(line.decode(ENC, errors="replace").strip())
                 except json.JSONDecodeError:
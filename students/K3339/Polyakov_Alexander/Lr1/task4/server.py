@@ -1,6 +1,20 @@
-import socket
-import threading
+import argparse
+import asyncio
+import itertools
 import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from collections import OrderedDict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import raise_fd_limit
+from framing import FrameTooLong, LineFramer
+
+from chatlog import ChatLog
 
 class ClientQuit(Exception):
     pass
@@ -8,58 +22,394 @@ class ClientQuit(Exception):
 HOST = "127.0.0.1"
 PORT = 7000
 ENC = "utf-8"
+READ_SIZE = 4096
+BACKLOG = 4096  # many clients may connect at once
 
-clients = {}
-# Mutex to protect concurrent access to `clients`
-clients_lock = threading.Lock()
+# Outbound queue limits (in messages) per client
+LAG_MARK = 256     # client is marked lagging above this...
+LAG_CLEAR = 64     # ...and back to normal once it drains below this
+MAX_QUEUE = 1024   # a client this far behind is disconnected
+# Extra time a writer waits to collect more lines before one write; 0 means
+# "whatever got queued during the current loop tick"
+COALESCE_SEC = 0.0
 
-def send_json(conn: socket.socket, obj: dict):
-    """Send one JSON object as a single NDJSON line."""
-    try:
-        data = (json.dumps(obj, ensure_ascii=False) + "\n").encode(ENC)
-        conn.sendall(data)  # blocking send; ensures the whole buffer goes out
-    except OSError:
-        pass
+DEFAULT_ROOM = "general"  # everyone starts here
+MAX_ROOM_NAME = 32
+HISTORY_SIZE = 50  # recent messages replayed to whoever joins a room
+# Rooms are created freely, so history is kept only for the most recently
+# active ones and within a total size; the least recently active room goes first
+HISTORY_ROOMS = 1000
+HISTORY_BYTES = 4 * 1024 * 1024
+LOG_SYNC_SEC = 0.2  # --log-dir: how often queued records are written and fsync'ed
+
+# Flood protection, per connection (0 = no limit)
+MSG_RATE = 20.0          # messages/s
+BYTE_RATE = 64 * 1024    # bytes/s
+BURST_SEC = 2.0          # a bucket holds this many seconds worth of tokens
+MAX_LINE = 16 * 1024     # longest accepted line, bytes
+FLOOD_POLICIES = ("delay", "drop", "disconnect")
+
+BUS_READ = 256 * 1024  # pub/sub hub relays whole lines read in chunks this big
+
+HELP = "Commands: /join <room>, /leave [room], /list, /msg <name> <text>, /quit"
+
+stats = {
+    "dropped_slow": 0, "lagging": 0, "lines_out": 0, "writes": 0, "bytes_out": 0,
+    "flood_delayed": 0, "flood_dropped": 0, "flood_disconnected": 0, "too_long": 0,
+}
+
+WORKER = 0  # index of this process in --workers mode
+_ids = itertools.count()
+
+class FloodLimits:
+    """What a single connection may send and what happens when it sends more."""
+    __slots__ = ("msg_rate", "byte_rate", "max_line", "policy")
+
+    def __init__(self, msg_rate=MSG_RATE, byte_rate=BYTE_RATE, max_line=MAX_LINE, policy="delay"):
+        self.msg_rate = msg_rate
+        self.byte_rate = byte_rate
+        self.max_line = max_line
+        self.policy = policy
+
+flood = FloodLimits()
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.burst = max(1.0, rate * BURST_SEC)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+
+    def need(self, n: float) -> float:
+        """Seconds until n tokens are available (0 = right now)."""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        # A single huge line can never exceed the burst, or it would wait forever
+        n = min(n, self.burst)
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+
+    def take(self, n: float):
+        if self.rate:
+            self.tokens -= min(n, self.burst)
+
+class Client:
+    """A connected user with its own bounded outbound queue.
+
+    Messages are appended as ready bytes; a per-client writer task
+    flushes them, so a slow reader only delays itself.
+    """
+    __slots__ = ("id", "writer", "name", "addr", "queue", "wakeup", "lagging", "task", "rooms", "room")
+
+    def __init__(self, writer: asyncio.StreamWriter, name: str, addr):
+        self.id = f"{WORKER}:{next(_ids)}"  # unique across worker processes
+        self.writer = writer
+        self.name = name
+        self.addr = addr
+        self.queue: deque[bytes] = deque()
+        self.wakeup = asyncio.Event()
+        self.lagging = False
+        self.rooms: set[str] = set()   # every room the client is in
+        self.room: str | None = None   # where plain messages go
+        self.task = asyncio.create_task(self.flush_loop())
+
+    def send(self, data: bytes):
+        if self.writer.is_closing():
+            return
+        if len(self.queue) >= MAX_QUEUE:
+            # Too far behind: drop the connection instead of buffering forever
+            stats["dropped_slow"] += 1
+            print(f"Dropping slow client {self.name} {self.addr}")
+            self.queue.clear()
+            self.writer.transport.abort()
+            return
+        self.queue.append(data)
+        if not self.lagging and len(self.queue) > LAG_MARK:
+            self.lagging = True
+            stats["lagging"] += 1
+        self.wakeup.set()
+
+    async def flush_loop(self):
+        try:
+            while True:
+                await self.wakeup.wait()
+                if COALESCE_SEC:
+                    await asyncio.sleep(COALESCE_SEC)
+                self.wakeup.clear()
+                while self.queue:
+                    # Everything queued so far goes out as one write
+                    count = len(self.queue)
+                    data = self.queue.popleft() if count == 1 else b"".join(self.queue)
+                    self.queue.clear()
+                    self.writer.write(data)
+                    stats["lines_out"] += count
+                    stats["writes"] += 1
+                    stats["bytes_out"] += len(data)
+                    # Waits only for this client's socket; lines keep piling up meanwhile
+                    await self.writer.drain()
+                    if self.lagging and len(self.queue) < LAG_CLEAR:
+                        self.lagging = False
+        except (OSError, asyncio.CancelledError):
+            pass
+
+# Indexes below are only touched from the event loop, so no lock
+clients: dict[asyncio.StreamWriter, Client] = {}  # writer -> Client
+names: dict[str, Client] = {}                     # name -> Client, for /msg
+rooms: dict[str, set[Client]] = {}                # room -> members
+history: OrderedDict[str, deque[bytes]] = OrderedDict()  # room -> last encoded lines, LRU order
+history_bytes = 0
+# Server-wide views, kept in sync through published events (all workers)
+roster: dict[str, int] = {}                       # name -> connections
+room_sizes: dict[str, int] = {}                   # room -> members
+
+# Connection to the pub/sub hub in --workers mode, None in a single process
+bus: asyncio.StreamWriter | None = None
+bus_out: list[bytes] = []
+
+# Persistent history (--log-dir); with workers only worker 0 writes it
+chat_log: ChatLog | None = None
+
+def encode_json(obj: dict) -> bytes:
+    """One JSON object as a single NDJSON line."""
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode(ENC)
+
+def send_json(client: Client, obj: dict):
+    client.send(encode_json(obj))
+
+def bump(counter: dict[str, int], key: str, delta: int):
+    n = counter.get(key, 0) + delta
+    if n > 0:
+        counter[key] = n
+    else:
+        counter.pop(key, None)
+
+def publish(event: dict, data: bytes = b"\n"):
+    """Apply an event that every worker must see, in the same order everywhere.
+
+    In a single process that is just deliver(). With workers the event goes
+    to the hub as one "<event json> TAB <data>" line and is applied when the hub
+    sends it back, the origin worker included.
+    """
+    if bus is None:
+        deliver(event, data)
+        return
+    if not bus_out:
+        asyncio.get_running_loop().call_soon(flush_bus)
+    bus_out.append(json.dumps(event, ensure_ascii=False).encode(ENC) + b"\t" + data)
+
+def flush_bus():
+    # Everything published during one loop tick goes to the hub in one write
+    data = b"".join(bus_out)
+    bus_out.clear()
+    if not bus.is_closing():
+        bus.write(data)
+
+def trim_history():
+    global history_bytes
+    while len(history) > HISTORY_ROOMS or history_bytes > HISTORY_BYTES:
+        _, lines = history.popitem(last=False)
+        history_bytes -= sum(map(len, lines))
+
+def remember(room: str, data: bytes):
+    global history_bytes
+    lines = history.get(room)
+    if lines is None:
+        lines = history[room] = deque(maxlen=HISTORY_SIZE)
+    else:
+        history.move_to_end(room)
+    if len(lines) == HISTORY_SIZE:
+        history_bytes -= len(lines[0])  # about to fall off the deque
+    lines.append(data)
+    history_bytes += len(data)
+    trim_history()
+
+def deliver(event: dict, data: bytes):
+    if "room" in event:
+        room = event["room"]
+        if "delta" in event:
+            bump(room_sizes, room, event["delta"])
+        if event.get("keep"):
+            remember(room, data)
+            if chat_log is not None:
+                chat_log.append(room, data)
+        members = rooms.get(room)
+        if not members:
+            return
+        skip = event.get("skip")
+        # Snapshot: dropping a slow client may change the set while we iterate
+        for c in list(members):
+            if c.id != skip:
+                c.send(data)
+    elif "to" in event:
+        target = names.get(event["to"])
+        if target is not None:
+            target.send(data)
+    elif "online" in event:
+        bump(roster, event["online"], 1)
+    elif "offline" in event:
+        bump(roster, event["offline"], -1)
+
+def broadcast_json(room: str, obj: dict, exclude: Client | None = None, remember: bool = False, delta: int = 0):
+    """Send obj to the members of one room only; `remember` keeps it for replay."""
+    event = {"room": room}
+    if exclude is not None:
+        event["skip"] = exclude.id
+    if remember:
+        event["keep"] = 1
+    if delta:
+        event["delta"] = delta  # membership change, for /list
+    # Encode once, every recipient (and the history) shares the same bytes object
+    publish(event, encode_json(obj))
+
+def system(client: Client, message: str):
+    send_json(client, {"name": "system", "message": message})
+
+def name_taken(name: str) -> bool:
+    # Names on other workers are only known once their "online" event is back,
+    # so two workers may briefly hand out the same name; /msg then reaches both
+    return name in names or name in roster
+
+def unique_name(name: str) -> str:
+    if not name_taken(name):
+        return name
+    n = 2
+    while name_taken(f"{name}#{n}"):
+        n += 1
+    return f"{name}#{n}"
+
+def join_room(client: Client, room: str):
+    if room not in client.rooms:
+        rooms.setdefault(room, set()).add(client)
+        client.rooms.add(room)
+        # Replay what was said before, as one already-encoded write
+        if room in history:
+            client.send(b"".join(history[room]))
+        broadcast_json(room, {"name": "system", "room": room, "message": f"{client.name} joined"},
+                       exclude=client, delta=1)
+    client.room = room
+    system(client, f"You are in #{room}")
+
+def leave_room(client: Client, room: str):
+    members = rooms.get(room)
+    if members is None or client not in members:
+        return
+    members.discard(client)
+    client.rooms.discard(room)
+    if not members:
+        del rooms[room]
+    # Other workers may still have members there
+    broadcast_json(room, {"name": "system", "room": room, "message": f"{client.name} left"}, delta=-1)
+    if client.room == room:
+        client.room = next(iter(client.rooms), None)
 
-def broadcast_json(obj: dict, exclude: socket.socket | None = None):
-    # Take a snapshot under lock to avoid iterating while the dict is modified
-    with clients_lock:
-        conns = list(clients.keys())
-    for c in conns:
-        if c is exclude:
-            continue
-        send_json(c, obj)
-
-def remove_client(conn: socket.socket):
-    with clients_lock:
-        info = clients.pop(conn, None)
+def handle_command(client: Client, text: str):
+    cmd, _, arg = text.partition(" ")
+    arg = arg.strip()
+    if cmd == "/join":
+        # Validate the name itself, so "/join #" can't create a room called ""
+        room = arg.lstrip("#")
+        if not room or len(room) > MAX_ROOM_NAME or any(ch.isspace() for ch in room):
+            system(client, f"Usage: /join <room> (up to {MAX_ROOM_NAME} chars, no spaces)")
+            return
+        join_room(client, room)
+    elif cmd == "/leave":
+        room = arg.lstrip("#") or client.room
+        if room is None:
+            system(client, "You are not in any room")
+            return
+        if room not in client.rooms:
+            system(client, f"You are not in #{room}")
+            return
+        leave_room(client, room)
+        system(client, f"Left #{room}" + (f", now in #{client.room}" if client.room else ""))
+    elif cmd == "/list":
+        listing = ", ".join(f"#{r} ({n})" for r, n in sorted(room_sizes.items()))
+        system(client, f"Rooms: {listing or 'none'}")
+    elif cmd == "/msg":
+        target_name, _, message = arg.partition(" ")
+        if not name_taken(target_name):
+            system(client, f"No such user: {target_name}")
+        elif message:
+            # The target may be connected to another worker
+            publish({"to": target_name}, encode_json({"name": client.name, "to": target_name, "message": message}))
+        else:
+            system(client, "Usage: /msg <name> <text>")
+    else:
+        system(client, HELP)
+
+async def remove_client(writer: asyncio.StreamWriter) -> Client | None:
+    client = clients.pop(writer, None)
+    if client is not None:
+        client.task.cancel()
+        # Last words (e.g. why we disconnect) still go out before the close
+        if client.queue and not writer.is_closing():
+            writer.write(b"".join(client.queue))
+        if names.get(client.name) is client:
+            del names[client.name]
+        publish({"offline": client.name})
+        for room in list(client.rooms):
+            leave_room(client, room)
+    writer.close()
     try:
-        conn.close()
+        await writer.wait_closed()
     except OSError:
         pass
-    return info
+    return client
+
+async def admit(client: Client, msgs: TokenBucket, volume: TokenBucket, size: int) -> bool:
+    """Charge one incoming line to the client's buckets, applying the flood policy."""
+    wait = max(msgs.need(1), volume.need(size))
+    if wait:
+        if flood.policy == "drop":
+            stats["flood_dropped"] += 1
+            return False
+        if flood.policy == "disconnect":
+            stats["flood_disconnected"] += 1
+            system(client, "Flood limit exceeded, bye")
+            raise ClientQuit
+        # "delay": stop reading this socket for a while, TCP pushes back on the sender
+        stats["flood_delayed"] += 1
+        await asyncio.sleep(wait)
+        msgs.need(1)
+        volume.need(size)
+    msgs.take(1)
+    volume.take(size)
+    return True
 
-def handle_client(conn: socket.socket, addr):
-    buf = bytearray()
+def line_too_long(client: Client):
+    stats["too_long"] += 1
+    if flood.policy == "disconnect":
+        system(client, f"Line longer than {flood.max_line} bytes, bye")
+        raise ClientQuit
 
-    def recv_chunk() -> bool:
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    addr = writer.get_extra_info("peername")
+    framer = LineFramer(max_frame=flood.max_line)
+
+    async def recv_chunk() -> bool:
         try:
-            chunk = conn.recv(4096)
+            chunk = await reader.read(READ_SIZE)
             if not chunk:
                 return False  # peer closed
-            buf.extend(chunk)
+            framer.feed(chunk)
             return True
         except OSError:
             return False
 
     # process hello message
     name = None
-    while b"\n" not in buf:
-        if not recv_chunk():
-            remove_client(conn)
-            return
-    line, _, rest = buf.partition(b"\n")
-    buf = bytearray(rest)
+    try:
+        while (line := framer.next()) is None:
+            if not await recv_chunk():
+                await remove_client(writer)
+                return
+    except FrameTooLong:
+        await remove_client(writer)
+        return
     try:
         hello = json.loads(line.decode(ENC).strip())
         # Validate structure of the hello message
@@ -69,21 +419,34 @@ def handle_client(conn: socket.socket, addr):
     except Exception:
         name = f"user@{addr[1]}"
 
-    # Register the client (protected by lock)
-    with clients_lock:
-        clients[conn] = {"name": name, "addr": addr}
+    # Register the client
+    name = unique_name(name)
+    client = clients[writer] = Client(writer, name, addr)
+    names[name] = client
+    publish({"online": name})
 
-    # Send system message + broadcast it to other connections
-    send_json(conn, {"name": "system", "message": f"Welcome, {name}! Type /quit to leave"})
-    broadcast_json({"name": "system", "message": f"{name} joined"}, exclude=conn)
+    # Send system message + put the client into the default room
+    system(client, f"Welcome, {name}! Type /quit to leave. {HELP}")
+    join_room(client, DEFAULT_ROOM)
+
+    msgs, volume = TokenBucket(flood.msg_rate), TokenBucket(flood.byte_rate)
 
     # process regular messages
     try:
         while True:
             # Drain all complete lines currently in buffer
-            while b"\n" in buf:
-                line, _, buf = buf.partition(b"\n")
-                text = line.decode(ENC).strip()
+            while True:
+                try:
+                    line = framer.next()
+                except FrameTooLong:
+                    # The framer already skips the rest of it
+                    line_too_long(client)
+                    continue
+                if line is None:
+                    break
+                if not await admit(client, msgs, volume, len(line) + 1):
+                    continue
+                text = line.decode(ENC, errors="replace").strip()
                 if not text:
                     continue
 
@@ -92,51 +455,214 @@ def handle_client(conn: socket.socket, addr):
                 except json.JSONDecodeError:
                     continue
 
+                message = obj.get("message") if isinstance(obj, dict) else str(obj)
+                if not message:
+                    continue
+
                 # Handle logout command (as message content)
-                if isinstance(obj, dict) and obj.get("message") == "/quit":
+                if message == "/quit":
                     raise ClientQuit
+                if isinstance(message, str) and message.startswith("/"):
+                    handle_command(client, message)
+                    continue
+                if client.room is None:
+                    system(client, "You are not in any room, /join one first")
+                    continue
 
                 # Enforce sender's name on the server (avoid spoofing)
-                out = {
-                    "name": name,
-                    "message": (obj.get("message") if isinstance(obj, dict) else str(obj))
-                }
-                if out["message"]:
-                    broadcast_json(out, exclude=conn)
-
-            if not recv_chunk():
+                out = {"name": name, "room": client.room, "message": message}
+                broadcast_json(client.room, out, exclude=client, remember=True)
+
+            if not await recv_chunk():
                 break
+    except ClientQuit:
+        pass
     finally:
-        info = remove_client(conn)
-        if info:
-            broadcast_json({"name": "system", "message": f"{info['name']} left"})
+        await remove_client(writer)
 
-def main():
-    # Create socket
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as srv:
-        # Rebind quickly after restart
-        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # Bind socker to listen on set port
-        srv.bind((HOST, PORT))
-        srv.listen(50) # set length of queue
-        print(f"Chat server is listening  on {HOST}:{PORT}")
+async def bus_loop(reader: asyncio.StreamReader):
+    """Apply events coming back from the hub, in the order it sends them."""
+    framer = LineFramer(keep_delim=True)  # the data part keeps its "\n" for the clients
+    while True:
+        chunk = await reader.read(BUS_READ)
+        if not chunk:
+            print(f"Worker {WORKER}: lost the pub/sub hub")
+            return
+        framer.feed(chunk)
+        for line in framer:
+            event, _, data = line.partition(b"\t")
+            deliver(json.loads(event), data)
+
+def load_history(log_dir: str, writable: bool):
+    global chat_log, history_bytes
+    log = ChatLog(log_dir)
+    started = time.perf_counter()
+    history.update(log.load(HISTORY_SIZE))
+    history_bytes = sum(len(line) for lines in history.values() for line in lines)
+    trim_history()
+    lines = sum(len(h) for h in history.values())
+    print(f"History: {lines} messages in {len(history)} rooms loaded from {log_dir} "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    if writable:
+        log.open(history)
+        chat_log = log
+
+async def log_sync_loop():
+    while True:
+        await asyncio.sleep(LOG_SYNC_SEC)
+        await chat_log.sync()
+
+async def serve(host: str = HOST, port: int = PORT, bus_path: str | None = None, log_dir: str | None = None):
+    global bus
+    bus_task = None
+    log_task = None
+    if log_dir is not None:
+        load_history(log_dir, writable=WORKER == 0)
+        if chat_log is not None:
+            log_task = asyncio.create_task(log_sync_loop())
+    if bus_path is not None:
+        # Join the hub before taking clients, so no event is applied locally only
+        bus_reader, bus = await asyncio.open_unix_connection(bus_path, limit=BUS_READ)
+        bus_task = asyncio.create_task(bus_loop(bus_reader))
+
+    # asyncio sets TCP_NODELAY on accepted sockets by itself
+    server = await asyncio.start_server(handle_client, host, port, backlog=BACKLOG,
+                                        reuse_address=True, reuse_port=bus_path is not None)
+    if bus_path is None:
+        print(f"Chat server is listening  on {host}:{port}")
+    else:
+        print(f"Worker {WORKER} (pid {os.getpid()}) is listening on {host}:{port}")
+    try:
+        async with server:
+            if bus_task is None:
+                await server.serve_forever()
+            else:
+                await bus_task
+    finally:
+        for w in list(clients):
+            w.close()
+        if log_task is not None:
+            log_task.cancel()
+            await chat_log.close()
+        print(f"Slow clients dropped: {stats['dropped_slow']}, lagging episodes: {stats['lagging']}")
+        print(f"Flood control: {stats['flood_delayed']} delayed, {stats['flood_dropped']} dropped, "
+              f"{stats['flood_disconnected']} disconnected, {stats['too_long']} too long lines")
+        writes = stats["writes"]
+        if writes:
+            print(f"Writes: {writes} for {stats['lines_out']} lines "
+                  f"({stats['lines_out'] - writes} saved), {stats['bytes_out'] / writes:.0f} bytes/write")
+
+async def run_hub(sock: socket.socket):
+    """Pub/sub hub: every line a worker sends is relayed to all workers.
+
+    Lines are forwarded whole and from one event loop, so every worker sees
+    the same events in the same order.
+    """
+    peers: list[asyncio.StreamWriter] = []
+
+    async def relay(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peers.append(writer)
+        buf = bytearray()
         try:
             while True:
-                conn, addr = srv.accept()
-                # Reduce interactive latency for small writes
-                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                # Start a thread for each client
-                threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
-        except KeyboardInterrupt:
-            print("\nStopping server...")
+                chunk = await reader.read(BUS_READ)
+                if not chunk:
+                    break
+                buf.extend(chunk)
+                cut = buf.rfind(b"\n") + 1
+                if cut:
+                    data = bytes(buf[:cut])
+                    del buf[:cut]
+                    for w in peers:
+                        w.write(data)
+        except OSError:
+            pass
         finally:
-            with clients_lock:
-                conns = list(clients.keys())
-            for c in conns:
-                try: c.shutdown(socket.SHUT_RDWR)
-                except OSError: pass
-                try: c.close()
-                except OSError: pass
+            peers.remove(writer)
+            writer.close()
+
+    server = await asyncio.start_unix_server(relay, sock=sock)
+    async with server:
+        await server.serve_forever()
+
+def run_worker(idx: int, host: str, port: int, bus_path: str, coalesce: float, limits: FloodLimits,
+               log_dir: str | None):
+    global WORKER, COALESCE_SEC, flood
+    WORKER, COALESCE_SEC, flood = idx, coalesce, limits
+    raise_fd_limit()
+    try:
+        asyncio.run(serve(host, port, bus_path, log_dir))
+    except KeyboardInterrupt:
+        pass
+
+def serve_workers(host: str, port: int, workers: int, bus_path: str, log_dir: str | None):
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("--workers needs SO_REUSEPORT and Unix sockets")
+
+    # Listen on the bus before any worker tries to connect
+    if os.path.exists(bus_path):
+        os.unlink(bus_path)
+    hub = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    hub.bind(bus_path)
+    hub.listen(workers)
+
+    procs = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(i, host, port, bus_path, COALESCE_SEC, flood, log_dir),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    print(f"Chat server listens on {host}:{port} with {workers} workers, hub at {bus_path}")
+    try:
+        asyncio.run(run_hub(hub))
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the workers too, let them print their totals
+        for p in procs:
+            p.join(timeout=1)
+        print("\nStopping server...")
+    finally:
+        os.unlink(bus_path)
+
+def main():
+    global COALESCE_SEC, flood
+    parser = argparse.ArgumentParser(description="Chat server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--coalesce-us", type=int, default=int(COALESCE_SEC * 1e6),
+                        help="extra microseconds to gather lines into one write (0 = one loop tick)")
+    parser.add_argument("--msg-rate", type=float, default=MSG_RATE,
+                        help="messages/s a connection may send (0 = unlimited)")
+    parser.add_argument("--byte-rate", type=float, default=BYTE_RATE,
+                        help="bytes/s a connection may send (0 = unlimited)")
+    parser.add_argument("--max-line", type=int, default=MAX_LINE, help="longest accepted line, bytes")
+    parser.add_argument("--flood-policy", choices=FLOOD_POLICIES, default="delay",
+                        help="what to do with a client over its rate limit")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of SO_REUSEPORT worker processes sharing a pub/sub hub (0 = one process)")
+    parser.add_argument("--bus", help="Unix socket path of the hub (default: in the temp dir, per port)")
+    parser.add_argument("--log-dir", help="keep room history in an append-only log in this directory")
+    args = parser.parse_args()
+    COALESCE_SEC = args.coalesce_us / 1e6
+    flood = FloodLimits(args.msg_rate, args.byte_rate, args.max_line, args.flood_policy)
+
+    if args.log_dir is not None:
+        # Before any worker maps the newest segment in load()
+        ChatLog(args.log_dir).repair()
+
+    if args.workers > 0:
+        bus_path = args.bus or os.path.join(tempfile.gettempdir(), f"chat-{args.port}.sock")
+        serve_workers(args.host, args.port, args.workers, bus_path, args.log_dir)
+        return
+
+    raise_fd_limit()
+    try:
+        asyncio.run(serve(args.host, args.port, log_dir=args.log_dir))
+    except KeyboardInterrupt:
+        print("\nStopping server...")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+# async_server.py
+import argparse
+import asyncio
+import inspect
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import raise_fd_limit
+
+from server import (
+    BACKLOG, HOST, KEEPALIVE_MAX, KEEPALIVE_TIMEOUT, MAX_LINE, NAME, PORT,
+    HTTPError, MyHTTPServer, Request, Response,
+)
+
+
+class AsyncHTTPServer(MyHTTPServer):
+    """MyHTTPServer on asyncio streams: same Request/Response/HTTPError and routing.
+
+    The request head is read with StreamReader and then parsed by the
+    inherited parse_request from an in-memory rfile, so parsing never
+    waits on the socket. The body is read up front the same way and
+    handed to the handler as io.BytesIO. handle_request may be overridden
+    with `async def`; its result is awaited if needed.
+    """
+
+    async def serve_forever(self):
+        # 1. Запуск сервера, каждое соединение - отдельная корутина
+        server = await asyncio.start_server(self.serve_client, self._host, self._port,
+                                            backlog=BACKLOG, limit=MAX_LINE)
+        print(f"HTTP server '{self._server_name}' is listening on http://{self._host}:{self._port} (asyncio)")
+        async with server:
+            await server.serve_forever()
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # 2. Обработка клиентского подключения: keep-alive, запросы идут друг за другом
+        try:
+            for served in range(1, KEEPALIVE_MAX + 1):
+                try:
+                    req = await self.read_request(reader)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    raise
+                except Exception as e:
+                    # we don't know where the next request would start;
+                    # anything but an HTTPError is answered with a 500
+                    await self.send(writer, self.error_response(e), False)
+                    return
+                if req is None:
+                    return
+
+                keep_alive = req.keep_alive and served < KEEPALIVE_MAX
+                try:
+                    resp = self.handle_request(req)
+                    if inspect.isawaitable(resp):
+                        resp = await resp
+                except Exception as e:
+                    resp = self.error_response(e)
+                    keep_alive = keep_alive and isinstance(e, HTTPError)
+                await self.send(writer, resp, keep_alive)
+                if not keep_alive:
+                    return
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            # client went away or stalled mid-request
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        # 3. Чтение head + body без блокировки; None - клиент закрыл соединение или молчит
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400, "Bad Request", "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(494, "Request header too large")
+
+        req = self.parse_request(io.BytesIO(head))
+        if req is None:
+            return None
+        n = req.content_length()
+        body = await asyncio.wait_for(reader.readexactly(n), KEEPALIVE_TIMEOUT) if n else b""
+        req.rfile = io.BytesIO(body)
+        return req
+
+    async def send(self, writer: asyncio.StreamWriter, resp: Response, keep_alive: bool):
+        # 6. Отправка ответа одной записью
+        writer.write(self.response_head(resp, keep_alive) + (resp.body or b""))
+        await writer.drain()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grades HTTP server (asyncio)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    serv = AsyncHTTPServer(args.host, args.port, NAME)
+    try:
+        asyncio.run(serv.serve_forever())
+    except KeyboardInterrupt:
+        print("\nStopping...")
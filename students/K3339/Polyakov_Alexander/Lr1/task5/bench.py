@@ -0,0 +1,104 @@
+"""Blocking vs asyncio HTTP server under concurrent keep-alive clients.
+
+Each server variant is started as a subprocess on its own port. For every
+concurrency level that many connections are opened at once and share
+--requests keep-alive GET / requests between them:
+
+    python bench.py --concurrency 1 100 1000 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchutil import free_port, percentile, raise_fd_limit, wait_ready
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+VARIANTS = {
+    "blocking, sequential": ["server.py", "--workers", "0"],
+    "blocking, thread pool": ["server.py"],
+    "asyncio": ["async_server.py"],
+}
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: bench\r\n\r\n"
+
+
+async def client(port: int, requests: int, latencies: list[float], timeout: float) -> int:
+    """Send `requests` GETs over one keep-alive connection; returns how many failed."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return requests
+    done = 0
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            writer.write(REQUEST)
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line[:15].lower() == b"content-length:":
+                    length = int(line[15:])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            done += 1
+            if b"connection: close" in head.lower():
+                # Server hit its per-connection limit, go on with a new one
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+    return requests - done
+
+
+async def run_level(port: int, concurrency: int, requests: int, timeout: float):
+    latencies: list[float] = []
+    per_conn = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    failed = await asyncio.gather(*(client(port, n, latencies, timeout) for n in per_conn if n))
+    return time.perf_counter() - started, sorted(latencies), sum(failed)
+
+
+def bench_variant(argv: list[str], levels: list[int], requests: int, timeout: float):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, *argv, "--port", str(port)],
+        cwd=HERE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        # Requests per level never drop below the number of connections
+        return [asyncio.run(run_level(port, c, max(requests, c), timeout)) for c in levels]
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the blocking and asyncio HTTP servers")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--requests", type=int, default=5000, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for one response")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    print(f"{'variant':<24} {'conns':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'failed':>7}")
+    for name, argv in VARIANTS.items():
+        for conc, (elapsed, lat, failed) in zip(args.concurrency, bench_variant(argv, args.concurrency, args.requests, args.timeout)):
+            print(f"{name:<24} {conc:>6} {len(lat) / elapsed:>8.0f} "
+                  f"{percentile(lat, 50) * 1000:>8.2f} {percentile(lat, 99) * 1000:>9.2f} {failed:>7}")
+
+if __name__ == "__main__":
+    main()
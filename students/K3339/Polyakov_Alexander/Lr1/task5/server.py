@@ -1,6 +1,12 @@
 # server.py
+import argparse
+import io
+import queue
+import selectors
 import socket
 import sys
+import threading
+import time
 from urllib.parse import urlsplit, parse_qs
 from email.utils import formatdate
 
@@ -11,7 +17,16 @@ NAME = "SERVER"
 MAX_LINE = 64 * 1024
 MAX_HEADERS = 100
 
+KEEPALIVE_TIMEOUT = 5   # seconds an idle keep-alive connection is kept open
+KEEPALIVE_MAX = 100     # requests served over one connection before closing it
+REQUEST_TIMEOUT = 10    # seconds to receive a whole request (line, headers, body)
+
+WORKERS = 32        # threads serving requests (0 = one connection at a time on the main thread)
+ACCEPT_QUEUE = 256  # connections with a request waiting for a free worker
+BACKLOG = 1024
+
 GRADES: dict[str, list[str]] = {}  # subject -> list of grades
+GRADES_LOCK = threading.Lock()     # workers add grades concurrently
 
 class HTTPError(Exception):
     def __init__(self, status: int, reason: str, body: str | None = None):
@@ -30,12 +45,22 @@ class Request:
         self.rfile = rfile
         self.headers: dict[str, str] = {}
         # Derived:
-        parts = urlsplit(target)
+        try:
+            parts = urlsplit(target)
+        except ValueError:  # e.g. "http://[/" - an unterminated IPv6 host
+            raise HTTPError(400, "Bad Request", "Malformed request target")
         self.path = parts.path or "/"
         self.query = parse_qs(parts.query, keep_blank_values=True)
+        self._body: bytes | None = None
+        self._body_read = False
 
-    def body(self) -> bytes | None:
-        """Read request body using Content-Length (per guide’s approach)."""
+    @property
+    def keep_alive(self) -> bool:
+        """HTTP/1.1 connections stay open unless the client asks to close."""
+        tokens = (t.strip().lower() for t in self.headers.get("connection", "").split(","))
+        return "close" not in tokens
+
+    def content_length(self) -> int | None:
         size = self.headers.get("content-length")
         if not size:
             return None
@@ -45,7 +70,17 @@ class Request:
             raise HTTPError(400, "Bad Request", "Invalid Content-Length")
         if n < 0:
             raise HTTPError(400, "Bad Request", "Negative Content-Length")
-        return self.rfile.read(n)
+        return n
+
+    def body(self) -> bytes | None:
+        """Read request body using Content-Length (per guide’s approach)."""
+        if self._body_read:
+            return self._body
+        n = self.content_length()
+        # Read once: on a kept-alive connection the next request follows the body
+        self._body = None if n is None else self.rfile.read(n)
+        self._body_read = True
+        return self._body
 
 
 class Response:
@@ -60,55 +95,245 @@ class Response:
         self.body = body
 
 
+class DeadlineReader(io.RawIOBase):
+    """Socket reads for rfile; while a request is read they share one deadline.
+
+    A plain socket timeout restarts on every recv, so a client sending a
+    byte every few seconds would hold its worker forever. Past the
+    deadline the read fails with 408 instead.
+    """
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.deadline: float | None = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int | None:
+        if self.deadline is not None:
+            left = self.deadline - time.monotonic()
+            if left <= 0:
+                raise HTTPError(408, "Request Timeout")
+            self.sock.settimeout(min(left, KEEPALIVE_TIMEOUT))
+        try:
+            return self.sock.recv_into(b)
+        except BlockingIOError:
+            return None  # non-blocking socket, nothing buffered yet
+        except TimeoutError:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                raise HTTPError(408, "Request Timeout")
+            raise
+
+
+class Connection:
+    """A client socket with its file wrappers, kept between requests."""
+    def __init__(self, sock: socket.socket, addr):
+        self.sock = sock
+        self.addr = addr
+        # file-like, one pair per connection: pipelined requests wait in rfile's buffer
+        self.reader = DeadlineReader(sock)
+        self.rfile = io.BufferedReader(self.reader)
+        self.wfile = sock.makefile("wb")
+        self.served = 0
+        self.idle_since = time.monotonic()
+
+    def start_request(self):
+        self.reader.deadline = time.monotonic() + REQUEST_TIMEOUT
+
+    def end_request(self):
+        """The request is read; answers are written with the usual timeout."""
+        self.reader.deadline = None
+        self.sock.settimeout(KEEPALIVE_TIMEOUT)
+
+    def buffered(self) -> bool:
+        """Is the next request (or part of it) already here? Never blocks."""
+        self.sock.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        finally:
+            self.sock.settimeout(KEEPALIVE_TIMEOUT)
+
+    def close(self):
+        for f in (self.rfile, self.wfile, self.sock):
+            try:
+                f.close()
+            except OSError:
+                pass
+
+
 class MyHTTPServer:
-    def __init__(self, host: str, port: int, server_name: str):
+    def __init__(self, host: str, port: int, server_name: str,
+                 workers: int = WORKERS, accept_queue: int = ACCEPT_QUEUE):
         self._host = host
         self._port = port
         self._server_name = server_name
+        self._workers = workers
+        self._accept_queue = accept_queue
 
     def serve_forever(self):
         # 1. Запуск сервера на сокете, обработка входящих соединений
         serv_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, proto=0)
         serv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         serv_sock.bind((self._host, self._port))
-        serv_sock.listen(50)
-        print(f"HTTP server '{self._server_name}' is listening on http://{self._host}:{self._port}")
+        serv_sock.listen(BACKLOG)
+        mode = f"{self._workers} worker threads" if self._workers > 0 else "one connection at a time"
+        print(f"HTTP server '{self._server_name}' is listening on http://{self._host}:{self._port} ({mode})")
 
         try:
+            if self._workers > 0:
+                self.serve_pool(serv_sock)
+            else:
+                while True:
+                    conn, addr = serv_sock.accept()
+                    self.serve_connection(conn, addr)
+        finally:
+            serv_sock.close()
+
+    def serve_pool(self, serv_sock: socket.socket):
+        # 1a. Главный поток принимает соединения и ждёт на них запросов в селекторе,
+        # рабочий поток занят соединением, только пока оно шлёт запросы
+        pending: queue.Queue = queue.Queue(self._accept_queue)
+        sel = selectors.DefaultSelector()
+        serv_sock.setblocking(False)
+        sel.register(serv_sock, selectors.EVENT_READ)
+        # Workers hand idle connections back through a queue, waking select() with a byte
+        returned: queue.SimpleQueue = queue.SimpleQueue()
+        wake_r, wake_w = socket.socketpair()
+        wake_r.setblocking(False)
+        wake_w.setblocking(False)
+        sel.register(wake_r, selectors.EVENT_READ)
+
+        def worker():
             while True:
-                conn, addr = serv_sock.accept()
-                try:
-                    self.serve_client(conn, addr)
-                except Exception as e:
-                    # best-effort error reporting
+                c = pending.get()
+                if self.serve_ready(c):
+                    returned.put(c)
                     try:
-                        self.send_error(conn, e)
-                    except Exception:
-                        pass
-                finally:
+                        wake_w.send(b"\0")
+                    except BlockingIOError:
+                        pass  # a wake-up is already pending
+                else:
+                    c.close()
+
+        def wait_request(c: Connection):
+            c.idle_since = time.monotonic()
+            sel.register(c.sock, selectors.EVENT_READ, c)
+
+        for i in range(self._workers):
+            threading.Thread(target=worker, name=f"http-worker-{i}", daemon=True).start()
+        next_sweep = time.monotonic() + 1.0
+        while True:
+            for key, _ in sel.select(timeout=1.0):
+                if key.fileobj is serv_sock:
+                    try:
+                        conn, addr = serv_sock.accept()
+                    except BlockingIOError:
+                        continue
+                    conn.setblocking(True)
+                    wait_request(Connection(conn, addr))
+                elif key.fileobj is wake_r:
                     try:
-                        conn.close()
-                    except OSError:
+                        while wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
                         pass
+                    while True:
+                        try:
+                            wait_request(returned.get_nowait())
+                        except queue.Empty:
+                            break
+                else:
+                    # A request (or EOF) arrived. Blocks while every worker is busy and
+                    # the queue is full; new clients then wait in the listen backlog
+                    sel.unregister(key.fileobj)
+                    pending.put(key.data)
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + 1.0
+                idle = [key.data for key in sel.get_map().values()
+                        if isinstance(key.data, Connection) and now - key.data.idle_since >= KEEPALIVE_TIMEOUT]
+                for c in idle:
+                    sel.unregister(c.sock)
+                    c.close()
+
+    def serve_ready(self, c: Connection) -> bool:
+        """Serve the requests a connection has sent; True - keep it for the next one."""
+        try:
+            c.sock.settimeout(KEEPALIVE_TIMEOUT)
+            while self.serve_request(c):
+                if not c.buffered():
+                    return True
+        except OSError:
+            # client went away or stalled mid-request
+            pass
+        except Exception as e:
+            print(f"Unhandled error for {c.addr}: {e!r}", file=sys.stderr)
+        return False
+
+    def serve_connection(self, conn: socket.socket, addr):
+        try:
+            self.serve_client(conn, addr)
+        except OSError:
+            # client went away or stayed idle too long
+            pass
+        except Exception as e:
+            print(f"Unhandled error for {addr}: {e!r}", file=sys.stderr)
         finally:
-            serv_sock.close()
+            try:
+                conn.close()
+            except OSError:
+                pass
 
     def serve_client(self, conn: socket.socket, addr):
-        # 2. Обработка клиентского подключения
-        req = self.parse_request(conn)
-        resp = self.handle_request(req)
-        self.send_response(conn, resp)
-
-    def parse_request(self, conn: socket.socket) -> Request:
-        # 3. Разбор request line (метод + url + версия) и подготовка rfile
+        # 2. Обработка клиентского подключения: keep-alive, запросы идут друг за другом
+        conn.settimeout(KEEPALIVE_TIMEOUT)
+        c = Connection(conn, addr)
+        try:
+            while self.serve_request(c):
+                pass
+        finally:
+            c.close()
 
-        # file-like
-        rfile = conn.makefile("rb")
+    def serve_request(self, c: Connection) -> bool:
+        """Read, handle and answer one request; True if the connection stays open."""
+        c.start_request()
+        try:
+            req = self.parse_request(c.rfile)
+        except OSError:
+            raise
+        except Exception as e:
+            # we don't know where the next request would start;
+            # anything but an HTTPError is answered with a 500
+            c.end_request()
+            self.send_error(c.wfile, e)
+            return False
+        if req is None:
+            return False
+
+        c.served += 1
+        keep_alive = req.keep_alive and c.served < KEEPALIVE_MAX
+        try:
+            resp = self.handle_request(req)
+        except Exception as e:
+            resp = self.error_response(e)
+            keep_alive = keep_alive and isinstance(e, HTTPError)
+        try:
+            # A body the handler didn't read must not be taken for the next request
+            req.body()
+        except HTTPError:
+            keep_alive = False
+        c.end_request()
+        self.send_response(c.wfile, resp, keep_alive)
+        return keep_alive
+
+    def parse_request(self, rfile) -> Request | None:
+        # 3. Разбор request line (метод + url + версия); None - клиент закрыл соединение
         req_line = rfile.readline(MAX_LINE + 1)
         if len(req_line) > MAX_LINE:
             raise HTTPError(414, "Request-URI Too Long")
         if not req_line:
-            raise HTTPError(400, "Bad Request", "Empty request line")
+            return None
 
         # HTTP uses ISO-8859-1 for headers/line-level bytes
         try:
@@ -164,7 +389,6 @@ class MyHTTPServer:
                     ("Server", self._server_name),
                     ("Content-Type", "text/html; charset=utf-8"),
                     ("Content-Length", str(len(body))),
-                    ("Connection", "close"),
                 ],
                 body=body,
             )
@@ -188,9 +412,8 @@ class MyHTTPServer:
                 raise HTTPError(400, "Bad Request", "Both 'subject' and 'grade' are required")
 
             # Add grade to the subject's list
-            if subject not in GRADES:
-                GRADES[subject] = []
-            GRADES[subject].append(grade)
+            with GRADES_LOCK:
+                GRADES.setdefault(subject, []).append(grade)
 
             # Post/Redirect/Get: redirect to index after successful POST
             return Response(
@@ -200,56 +423,66 @@ class MyHTTPServer:
                     ("Server", self._server_name),
                     ("Location", "/"),
                     ("Content-Length", "0"),
-                    ("Connection", "close"),
                 ],
                 body=b"",
             )
 
         raise HTTPError(404, "Not Found")
 
-    def send_response(self, conn: socket.socket, resp: Response):
+    def response_head(self, resp: Response, keep_alive: bool) -> bytes:
+        """Status line + headers + CRLF."""
+        lines = [f"HTTP/1.1 {resp.status} {resp.reason}"]
+        lines.extend(f"{k}: {v}" for (k, v) in resp.headers)
+        if keep_alive:
+            lines.append("Connection: keep-alive")
+            lines.append(f"Keep-Alive: timeout={KEEPALIVE_TIMEOUT}, max={KEEPALIVE_MAX}")
+        else:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1")
+
+    def send_response(self, wfile, resp: Response, keep_alive: bool = False):
         # 6. Отправка ответа: status line + headers + CRLF + body
-        wfile = conn.makefile("wb")
-        status_line = f"HTTP/1.1 {resp.status} {resp.reason}\r\n"
-        wfile.write(status_line.encode("iso-8859-1"))
-        for (k, v) in resp.headers:
-            header_line = f"{k}: {v}\r\n"
-            wfile.write(header_line.encode("iso-8859-1"))
-        wfile.write(b"\r\n")
+        # status line + headers as one write, then the body
+        wfile.write(self.response_head(resp, keep_alive))
         if resp.body:
             wfile.write(resp.body)
         wfile.flush()
 
-    def send_error(self, conn: socket.socket, err: Exception):
+    def error_response(self, err: Exception) -> Response:
         """Uniform error path mirroring the guide: map exceptions to an HTTP response."""
         if isinstance(err, HTTPError):
             status, reason, body_text = err.status, err.reason, err.body
         else:
             status, reason, body_text = 500, "Internal Server Error", "Internal Server Error"
         body = body_text.encode("utf-8")
-        resp = Response(
+        return Response(
             status, reason,
             headers=[
                 ("Date", formatdate(usegmt=True)),
                 ("Server", self._server_name),
                 ("Content-Type", "text/plain; charset=utf-8"),
                 ("Content-Length", str(len(body))),
-                ("Connection", "close"),
             ],
             body=body,
         )
+
+    def send_error(self, wfile, err: Exception):
+        """Best-effort error reply; the connection is closed afterwards."""
         try:
-            self.send_response(conn, resp)
+            self.send_response(wfile, self.error_response(err))
         except Exception:
             pass
 
     def render_index_html(self) -> str:
-        if not GRADES:
+        # Copy under the lock, render without it
+        with GRADES_LOCK:
+            records = [(subject, list(grades)) for subject, grades in GRADES.items()]
+        if not records:
             rows = "<tr><td colspan='2' style='color:#777'>no records yet</td></tr>"
         else:
             rows = "\n".join(
                 f"<tr><td>{self._esc(subject)}</td><td>{', '.join(self._esc(grade) for grade in grades)}</td></tr>"
-                for subject, grades in GRADES.items()
+                for subject, grades in records
             )
 
         return f"""<!doctype html>
@@ -300,8 +533,16 @@ class MyHTTPServer:
 
 
 if __name__ == "__main__":
-
-    serv = MyHTTPServer(HOST, PORT, NAME)
+    parser = argparse.ArgumentParser(description="Grades HTTP server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="threads serving requests (0 = one connection at a time)")
+    parser.add_argument("--accept-queue", type=int, default=ACCEPT_QUEUE,
+                        help="connections with a request waiting for a free worker")
+    args = parser.parse_args()
+
+    serv = MyHTTPServer(args.host, args.port, NAME, args.workers, args.accept_queue)
     try:
         serv.serve_forever()
     except KeyboardInterrupt: